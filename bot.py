@@ -10,25 +10,49 @@ Commands:
 Send a video or file to the bot to add it to the pipeline.
 """
 import asyncio
+import bisect
+import hashlib
+import html
+import io
+import itertools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import os
 import tempfile
+import threading
+import time
 import re
-from datetime import datetime
+from datetime import datetime, timedelta, time as dt_time
 from pathlib import Path
 
+import requests
+
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
+    AIORateLimiter,
     ApplicationBuilder,
     CommandHandler,
     CallbackQueryHandler,
     ContextTypes,
     MessageHandler,
+    PicklePersistence,
     filters,
 )
 
 from config import WIB
 import config
+import limits
+from streams import TailingReader
+
+# Optional: libuv-backed event loop — noticeably faster socket I/O and
+# task dispatch. Installed before ApplicationBuilder so PTB's loop picks
+# it up; the default asyncio loop is used when uvloop isn't available.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 # Logging setup
 logging.basicConfig(
@@ -62,92 +86,142 @@ def get_sheets():
 
 
 def get_scheduler():
-    """Lazy init Scheduler."""
+    """Lazy init Scheduler, sharing the bot's Drive/Sheets clients."""
     global _sched
     if _sched is None:
         from scheduler import Scheduler
-        _sched = Scheduler()
+        # Hand over our singletons so the scheduler reuses their
+        # authenticated HTTP sessions instead of building its own.
+        _sched = Scheduler(sheets=get_sheets(), drive=get_drive())
     return _sched
 
 
+# Serializes first-time client construction so two concurrent handlers
+# can't both run the OAuth handshake
+_clients_lock = asyncio.Lock()
+
+
+async def _ensure_clients():
+    """Build the Drive/Sheets/Scheduler singletons off the event loop, once."""
+    if _sched is not None:
+        return  # fast path: everything already constructed
+    async with _clients_lock:
+        if _sched is None:
+            # get_scheduler() pulls in get_sheets() and get_drive() too
+            await asyncio.to_thread(get_scheduler)
+
+
+# Result of the last service-account check, keyed on file mtime + size
+# so the JSON is only re-parsed when the file actually changes
+_google_cfg_cache: tuple[int, int, str | None] | None = None
+
+
 def _google_not_configured() -> str | None:
     """Check if Google credentials are configured. Returns error message or None."""
-    import json
+    global _google_cfg_cache
     sa_path = config.GOOGLE_SERVICE_ACCOUNT_FILE
     try:
-        with open(sa_path, "r") as f:
-            data = json.load(f)
-            if not data.get("client_email"):
-                raise ValueError("Missing client_email")
-    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        st = os.stat(sa_path)
+        key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = (-1, -1)
+    if _google_cfg_cache is not None and _google_cfg_cache[:2] == key:
+        return _google_cfg_cache[2]
+    err = _check_google_config(sa_path)
+    _google_cfg_cache = key + (err,)
+    return err
+
+
+def _check_google_config(sa_path: str) -> str | None:
+    """Uncached service-account validation backing _google_not_configured."""
+    try:
+        import orjson as json_impl  # optional: faster cold-path parse
+    except ImportError:
+        import json as json_impl
+    try:
+        data = json_impl.loads(Path(sa_path).read_bytes())
+        if not data.get("client_email"):
+            raise ValueError("Missing client_email")
+    # JSONDecodeError is a ValueError subclass for both implementations
+    except (FileNotFoundError, ValueError):
         return (
-            "⚠️ **Google belum di-setup!**\n\n"
+            "⚠️ <b>Google belum di-setup!</b>\n\n"
             "Untuk menggunakan fitur ini, kamu perlu:\n"
             "1. Buat Service Account di Google Cloud Console\n"
             "2. Download JSON key\n"
-            "3. Simpan ke `credentials/service_account.json`\n"
-            "4. Isi `GOOGLE_SHEET_ID` dan `GOOGLE_DRIVE_FOLDER_ID` di `.env`\n\n"
+            "3. Simpan ke <code>credentials/service_account.json</code>\n"
+            "4. Isi <code>GOOGLE_SHEET_ID</code> dan <code>GOOGLE_DRIVE_FOLDER_ID</code> di <code>.env</code>\n\n"
             "📖 Lihat README.md untuk panduan lengkap."
         )
     if not config.GOOGLE_SHEET_ID:
-        return "⚠️ `GOOGLE_SHEET_ID` belum diisi di file `.env`"
+        return "⚠️ <code>GOOGLE_SHEET_ID</code> belum diisi di file <code>.env</code>"
     if not config.GOOGLE_DRIVE_FOLDER_ID:
-        return "⚠️ `GOOGLE_DRIVE_FOLDER_ID` belum diisi di file `.env`"
+        return "⚠️ <code>GOOGLE_DRIVE_FOLDER_ID</code> belum diisi di file <code>.env</code>"
     return None
 
 
-# Per-user active channel
-_user_channels: dict[int, str] = {}
+# Per-user state (active channel/platform) lives in context.user_data,
+# which PTB persists to disk so choices survive restarts.
 
 
-def _get_active_channel(user_id: int) -> str:
-    """Get the active channel for a user."""
-    return _user_channels.get(user_id, config.DEFAULT_CHANNEL)
+def _get_active_channel(context: ContextTypes.DEFAULT_TYPE) -> str:
+    """Get the active channel for the current user."""
+    return context.user_data.get("active_channel", config.DEFAULT_CHANNEL)
 
 
 # ─── Command Handlers ──────────────────────────────────────────────
 
 
+# Static pieces of the /start message, built once at import. Only the
+# active-channel line varies per user.
+_CHANNELS_LIST = ", ".join(f"<code>{c}</code>" for c in config.YOUTUBE_CHANNELS)
+
+# Case-insensitive name → canonical channel name, for O(1) /channel match
+_CHANNEL_LOOKUP = {c.lower(): c for c in config.YOUTUBE_CHANNELS}
+
+_START_MSG_BODY = (
+    "<b>📥 CARA UPLOAD (Pilih salah satu):</b>\n"
+    "1. <b>Kirim File Video</b> langsung ke chat ini (.mp4, .mov, dll)\n"
+    "2. <b>Kirim Link Sosmed!</b> Bot akan otomatis download tanpa watermark dari:\n"
+    "   👉 YouTube (Shorts/Video normal)\n"
+    "   👉 TikTok\n"
+    "   👉 Instagram (Reels)\n"
+    "   👉 X / Twitter\n\n"
+    "<b>⚙️ OTOMATISASI PIPELINE:</b>\n"
+    "Setelah dikirim, ini yang bot lakukan:\n"
+    "1. ☁️ Backup video ke Google Drive\n"
+    "2. 🧠 Groq AI membuat Judul, Deskripsi & Auto-Tags SEO\n"
+    "3. 📝 Dicatat di Google Sheets (Sesuai Platform)\n"
+    "4. 📅 Masuk antrian scheduler\n\n"
+    "<b>⏰ JADWAL VIRAL (Max 6x/hari):</b>\n"
+    "• 21:00 WIB → 🇬🇧🇪🇺 Europe sore\n"
+    "• 00:00 WIB → 🇺🇸 USA East siang\n"
+    "• 03:00 WIB → 🇺🇸 USA West siang\n\n"
+    "<b>🛠️ COMMANDS:</b>\n"
+    "/platform — Ganti target upload (YouTube / Facebook)\n"
+    "/queue — Cek antrian & estimasi jam upload\n"
+    "/status — Ringkasan quota harian\n"
+    "/upload — Bypass jadwal & upload paksa 1 video sekarang\n"
+    "/channel — Menu pindah channel (Khusus YouTube)\n"
+    "/ask — Brainstorming ide dengan Groq AI & otomatis save ke Sheets\n"
+)
+
+
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command."""
-    user_id = update.effective_user.id
-    active_ch = _get_active_channel(user_id)
-    channels_list = ", ".join(f"<code>{c}</code>" for c in config.YOUTUBE_CHANNELS)
+    active_ch = _get_active_channel(context)
 
     msg = (
         "🎬 <b>Auto YouTube Uploader Bot</b> 🚀\n\n"
         "<b>📺 INFO CHANNEL:</b>\n"
         f"• Aktif saat ini: <code>{active_ch}</code>\n"
-        f"• Tersedia: {channels_list}\n"
+        f"• Tersedia: {_CHANNELS_LIST}\n"
         "<i>(Ganti tujuan pakai /channel nama_channel sebelum kirim video)</i>\n\n"
-        "<b>📥 CARA UPLOAD (Pilih salah satu):</b>\n"
-        "1. <b>Kirim File Video</b> langsung ke chat ini (.mp4, .mov, dll)\n"
-        "2. <b>Kirim Link Sosmed!</b> Bot akan otomatis download tanpa watermark dari:\n"
-        "   👉 YouTube (Shorts/Video normal)\n"
-        "   👉 TikTok\n"
-        "   👉 Instagram (Reels)\n"
-        "   👉 X / Twitter\n\n"
-        "<b>⚙️ OTOMATISASI PIPELINE:</b>\n"
-        "Setelah dikirim, ini yang bot lakukan:\n"
-        "1. ☁️ Backup video ke Google Drive\n"
-        "2. 🧠 Groq AI membuat Judul, Deskripsi & Auto-Tags SEO\n"
-        "3. 📝 Dicatat di Google Sheets (Sesuai Platform)\n"
-        "4. 📅 Masuk antrian scheduler\n\n"
-        "<b>⏰ JADWAL VIRAL (Max 6x/hari):</b>\n"
-        "• 21:00 WIB → 🇬🇧🇪🇺 Europe sore\n"
-        "• 00:00 WIB → 🇺🇸 USA East siang\n"
-        "• 03:00 WIB → 🇺🇸 USA West siang\n\n"
-        "<b>🛠️ COMMANDS:</b>\n"
-        "/platform — Ganti target upload (YouTube / Facebook)\n"
-        "/queue — Cek antrian & estimasi jam upload\n"
-        "/status — Ringkasan quota harian\n"
-        "/upload — Bypass jadwal & upload paksa 1 video sekarang\n"
-        "/channel — Menu pindah channel (Khusus YouTube)\n"
-        "/ask — Brainstorming ide dengan Groq AI & otomatis save ke Sheets\n"
+        f"{_START_MSG_BODY}"
     )
     await update.message.reply_text(
-        msg, 
-        parse_mode="HTML", 
+        msg,
+        parse_mode="HTML",
         disable_web_page_preview=True
     )
 
@@ -159,12 +233,16 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(err, parse_mode="HTML")
         return
     try:
-        msg = get_scheduler().get_status_message()
+        msg = await asyncio.to_thread(get_scheduler().get_status_message)
         await update.message.reply_text(msg, parse_mode="HTML")
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
 
 
+# How many recent /ask results to keep per user for the save button
+_ASK_IDEAS_KEEP = 10
+
+
 async def cmd_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /ask command to brainstorm with Groq."""
     if not context.args:
@@ -182,15 +260,47 @@ async def cmd_ask(update: Update, context: ContextTypes.DEFAULT_TYPE):
     wait_msg = await update.message.reply_text("🧠 <i>Groq sedang berpikir...</i>", parse_mode="HTML")
     
     try:
-        from groq_metadata import ask_groq
-        response = ask_groq(prompt)
-        
-        # Save prompt and response in context for callback
-        context.user_data["last_ask_prompt"] = prompt
-        context.user_data["last_ask_response"] = response
-        
+        from groq_metadata import ask_groq_stream
+
+        # Consume the Groq token stream in a worker thread while this
+        # coroutine shows the partial answer, throttled well under
+        # Telegram's edit limits
+        pieces: list[str] = []
+        done = threading.Event()
+
+        def _consume():
+            try:
+                for piece in ask_groq_stream(prompt):
+                    pieces.append(piece)
+            finally:
+                done.set()
+
+        consumer = asyncio.create_task(asyncio.to_thread(_consume))
+
+        shown = ""
+        while not done.is_set():
+            await asyncio.sleep(0.5)
+            partial = "".join(pieces)
+            if partial and partial != shown and len(partial) <= 4000:
+                shown = partial
+                await _edit_status(wait_msg, f"{partial} ▌")
+        await consumer  # surface API errors from the stream
+
+        response = "".join(pieces) or "❌ Groq tidak mengembalikan jawaban."
+
+        # Key the idea by content digest so the save button survives a
+        # newer /ask (and restarts, via persistence) instead of always
+        # pointing at the latest response
+        digest = hashlib.blake2b(
+            f"{prompt}\n{response}".encode(), digest_size=8
+        ).hexdigest()
+        ideas = context.user_data.setdefault("ask_ideas", {})
+        ideas[digest] = (prompt, response)
+        while len(ideas) > _ASK_IDEAS_KEEP:  # dicts iterate oldest-first
+            ideas.pop(next(iter(ideas)))
+
         keyboard = [
-            [InlineKeyboardButton("💾 Simpan ke Sheet 'Ideas'", callback_data="save_idea")]
+            [InlineKeyboardButton("💾 Simpan ke Sheet 'Ideas'", callback_data=f"save_idea:{digest}")]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -215,38 +325,42 @@ async def ask_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    if query.data == "save_idea":
-        prompt = context.user_data.get("last_ask_prompt")
-        response = context.user_data.get("last_ask_response")
-        
-        if not prompt or not response:
+    if query.data.startswith("save_idea"):
+        if ":" in query.data:
+            digest = query.data.split(":", 1)[1]
+            idea = context.user_data.get("ask_ideas", {}).get(digest)
+        else:
+            # Button from before digest-keyed storage
+            prompt = context.user_data.get("last_ask_prompt")
+            response = context.user_data.get("last_ask_response")
+            idea = (prompt, response) if prompt and response else None
+
+        if idea is None:
             await query.edit_message_reply_markup(reply_markup=None)
             await query.message.reply_text("⚠️ Data ide sudah kedaluwarsa, silakan buat ide baru.")
             return
-            
+
+        prompt, response = idea
+
         try:
             sheets = get_sheets()
-            sheets.save_idea(prompt, response)
+            await asyncio.to_thread(sheets.save_idea, prompt, response)
             await query.edit_message_reply_markup(reply_markup=None)
             await query.message.reply_text("✅ Ide berhasil disimpan ke tab <b>Ideas</b> di Google Sheets!", parse_mode="HTML")
         except Exception as e:
             await query.message.reply_text(f"❌ Gagal menyimpan ide: {e}")
 
 
-# Per-user active platform ("youtube" or "facebook")
-_user_platforms: dict[int, str] = {}
-
-def _get_active_platform(user_id: int) -> str:
-    """Get the active platform for a user. Default is youtube."""
-    return _user_platforms.get(user_id, "youtube")
+def _get_active_platform(context: ContextTypes.DEFAULT_TYPE) -> str:
+    """Get the active platform for the current user. Default is youtube."""
+    return context.user_data.get("active_platform", "youtube")
 
 async def cmd_platform(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /platform command — switch active target (youtube vs facebook)."""
-    user_id = update.effective_user.id
     args = context.args
 
     if not args:
-        active = _get_active_platform(user_id)
+        active = _get_active_platform(context)
         platforms = ["youtube", "facebook"]
         platform_list = "\n".join(
             f"  {'\u2705' if p == active else '\u25cb'} <code>{p}</code>"
@@ -269,7 +383,7 @@ async def cmd_platform(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    _user_platforms[user_id] = new_platform
+    context.user_data["active_platform"] = new_platform
     await update.message.reply_text(
         f"✅ <b>Platform berhasil diubah!</b>\n"
         f"Target upload sekarang: <code>{new_platform}</code>",
@@ -278,12 +392,11 @@ async def cmd_platform(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_channel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /channel command — switch active YouTube channel."""
-    user_id = update.effective_user.id
     args = context.args
 
     if not args:
         # Show current channel and list
-        active = _get_active_channel(user_id)
+        active = _get_active_channel(context)
         channels_list = "\n".join(
             f"  {'\u2705' if c == active else '\u25cb'} <code>{c}</code>"
             for c in config.YOUTUBE_CHANNELS
@@ -299,11 +412,7 @@ async def cmd_channel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target = " ".join(args).strip()
 
     # Match by name (case-insensitive)
-    matched = None
-    for ch in config.YOUTUBE_CHANNELS:
-        if ch.lower() == target.lower():
-            matched = ch
-            break
+    matched = _CHANNEL_LOOKUP.get(target.lower())
 
     # Match by index (1-based)
     if matched is None:
@@ -315,15 +424,14 @@ async def cmd_channel(update: Update, context: ContextTypes.DEFAULT_TYPE):
             pass
 
     if matched is None:
-        channels_list = ", ".join(f"<code>{c}</code>" for c in config.YOUTUBE_CHANNELS)
         await update.message.reply_text(
             f"❌ Channel <code>{target}</code> tidak ditemukan.\n"
-            f"Channels tersedia: {channels_list}",
+            f"Channels tersedia: {_CHANNELS_LIST}",
             parse_mode="HTML",
         )
         return
 
-    _user_channels[user_id] = matched
+    context.user_data["active_channel"] = matched
     await update.message.reply_text(
         f"✅ Channel switched ke <b>{matched}</b>\n"
         f"Video berikutnya akan di-upload ke channel ini.",
@@ -331,6 +439,35 @@ async def cmd_channel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+# Icons shown per video status in /queue
+STATUS_ICON = {
+    "pending": "⏳",
+    "scheduled": "📅",
+    "uploading": "📤",
+    "uploaded": "✅",
+    "failed": "❌",
+}
+
+# Queue display order: active first, then FIFO pending, then scheduled
+_QUEUE_STATUS_ORDER = {"uploading": 0, "pending": 1, "scheduled": 2}
+
+
+def _parse_schedule_minutes() -> tuple[int, ...]:
+    """Parse UPLOAD_SCHEDULE_HOURS into sorted minutes-since-midnight."""
+    minutes = []
+    for t in config.UPLOAD_SCHEDULE_HOURS:
+        try:
+            h, m = t.split(":")
+            minutes.append(int(h) * 60 + int(m))
+        except ValueError:
+            continue
+    return tuple(sorted(minutes))
+
+
+# Upload slots, folded to a constant at import (config is env-fixed)
+_SCHEDULE_MINUTES = _parse_schedule_minutes()
+
+
 async def cmd_queue(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /queue command — show today's scheduled uploads."""
     err = _google_not_configured()
@@ -338,14 +475,17 @@ async def cmd_queue(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(err, parse_mode="HTML")
         return
     try:
-        sched = get_scheduler()
         sheets = get_sheets()
-        
-        # Get all scheduled and pending videos ONLY from YouTube
-        scheduled = sheets.get_scheduled_videos("all", platform="youtube")
-        pending = sheets.get_pending_videos(platform="youtube")
 
-        videos = scheduled + pending
+        # Queue and summary parse the same cached sheet snapshot, so one
+        # worker-thread hop serves both (and at most one API fetch)
+        def _fetch():
+            return (
+                sheets.get_queue(platform="youtube"),
+                sheets.get_queue_summary(platform="youtube"),
+            )
+
+        videos, summary = await asyncio.to_thread(_fetch)
 
         if not videos:
             await update.message.reply_text("📭 Tidak ada video dalam antrian.")
@@ -354,43 +494,33 @@ async def cmd_queue(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Calculate estimated times
         now = datetime.now(WIB)
         current_minutes = now.hour * 60 + now.minute
-        schedule_minutes = sorted(
-            [int(t.split(":")[0]) * 60 + int(t.split(":")[1]) for t in config.UPLOAD_SCHEDULE_HOURS]
-        )
-        
-        summary = sheets.get_queue_summary(platform="youtube")
-        
+        schedule_minutes = _SCHEDULE_MINUTES
+
         # Sort videos: pending first (FIFO), then scheduled by date
         def sort_key(v):
-            status_order = {"uploading": 0, "pending": 1, "scheduled": 2}.get(v["status"], 3)
+            status_order = _QUEUE_STATUS_ORDER.get(v["status"], 3)
             date_str = v.get("scheduled_date", "9999-12-31")
             return (status_order, date_str, v["row"])
             
         videos.sort(key=sort_key)
         
-        # Setup counters for today's quota
+        # Setup counters for today's quota; the slots are sorted, so the
+        # next one is a bisect away (wrapping to the first past midnight)
         remaining_today = summary['remaining_today']
-        next_slot_idx = 0
-        
-        for i, m in enumerate(schedule_minutes):
-            if m > current_minutes:
-                next_slot_idx = i
-                break
-                
-        msg = "📋 <b>Antrian Upload:</b>\n\n"
-        
+        next_slot_idx = (
+            bisect.bisect_right(schedule_minutes, current_minutes)
+            % len(schedule_minutes)
+        ) if schedule_minutes else 0
+
+
+        parts = ["📋 <b>Antrian Upload:</b>\n\n"]
+        _esc = html.escape  # local bind — called twice per queue entry
+
         for i, v in enumerate(videos[:30]): # Show up to 30 items
-            status_icon = {
-                "pending": "⏳",
-                "scheduled": "📅",
-                "uploading": "📤",
-                "uploaded": "✅",
-                "failed": "❌",
-            }.get(v["status"], "❓")
-
-            import html
-            title = html.escape(v.get("title") or v["filename"])
-            ch = html.escape(v.get("channel", config.DEFAULT_CHANNEL))
+            status_icon = STATUS_ICON.get(v["status"], "❓")
+
+            title = _esc(v.get("title") or v["filename"])
+            ch = _esc(v.get("channel", config.DEFAULT_CHANNEL))
             
             # Estimate time
             if v["status"] in ("pending", "scheduled"):
@@ -413,14 +543,39 @@ async def cmd_queue(update: Update, context: ContextTypes.DEFAULT_TYPE):
             else:
                 est = ""
 
-            msg += f"{i+1}. 📺 {status_icon} <code>{title}</code> → {ch}{est}\n"
+            parts.append(f"{i+1}. 📺 {status_icon} <code>{title}</code> → {ch}{est}\n")
 
-        msg += f"\n📊 Total: {len(videos)} video"
-        await update.message.reply_text(msg, parse_mode="HTML")
+        parts.append(f"\n📊 Total: {len(videos)} video")
+        await update.message.reply_text("".join(parts), parse_mode="HTML")
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
 
 
+# Shared end-of-pipeline reply, formatted once per video in both the
+# file and URL handlers
+_PIPELINE_DONE_TPL = (
+    "✅ <b>Pipeline selesai!</b>\n\n"
+    "📄 File: <code>{file_name}</code>\n"
+    "📝 Title: {title}\n"
+    "🏷️ Tags: {tags}\n\n"
+    "{status_msg}\n\n"
+    "💡 Kamu bisa edit metadata di Google Sheets sebelum upload."
+)
+
+
+def _format_result(r: dict) -> str:
+    """Format one upload result as an HTML block for a digest message."""
+    fname = html.escape(r.get("filename", "Unknown"))
+    if r["success"]:
+        return (
+            f"✅ <b>Uploaded!</b>\n"
+            f"📹 <code>{fname}</code>\n"
+            f"🔗 {r['youtube_link']}"
+        )
+    err_msg = html.escape(r.get("error", "Unknown"))
+    return f"❌ <b>Failed:</b> <code>{fname}</code>\nError: {err_msg}"
+
+
 async def cmd_upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /upload command — manually trigger queue processing."""
     err = _google_not_configured()
@@ -430,12 +585,11 @@ async def cmd_upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🔄 Force upload — mengabaikan jadwal...")
 
     try:
-        # Uploading to YouTube is a blocking network operation
-        # Run it in a background thread so the bot stays responsive
-        results = await asyncio.to_thread(get_scheduler().force_upload)
+        sched = get_scheduler()
+        batch = await asyncio.to_thread(sched.plan_force_batch)
 
-        if not results:
-            summary = get_sheets().get_queue_summary()
+        if not batch:
+            summary = await asyncio.to_thread(get_sheets().get_queue_summary)
             if summary["remaining_today"] <= 0:
                 await update.message.reply_text(
                     "⚠️ Limit upload harian tercapai (6/hari).\n"
@@ -447,28 +601,36 @@ async def cmd_upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
             return
 
-        for r in results:
-            import html
-            fname = html.escape(r.get('filename', 'Unknown'))
-            if r["success"]:
-                await update.message.reply_text(
-                    f"✅ <b>Uploaded!</b>\n"
-                    f"📹 <code>{fname}</code>\n"
-                    f"🔗 {r['youtube_link']}",
-                    parse_mode="HTML",
-                    disable_web_page_preview=True,
-                )
-            else:
-                err_msg = html.escape(r.get('error', 'Unknown'))
-                await update.message.reply_text(
-                    f"❌ <b>Failed:</b> <code>{fname}</code>\n"
-                    f"Error: {err_msg}",
-                    parse_mode="HTML",
-                )
+        # Uploads are network-bound, so overlap up to 3 in worker threads.
+        # Per-platform quota was already settled in plan_force_batch().
+        sem = asyncio.Semaphore(3)
+
+        async def _one(video):
+            async with sem:
+                return await asyncio.to_thread(sched.upload_one, video)
+
+        # Report each upload as it completes instead of one long wait
+        for done in asyncio.as_completed([_one(v) for v in batch]):
+            result = await done
+            await update.message.reply_text(
+                _format_result(result),
+                parse_mode="HTML",
+                disable_web_page_preview=True,
+            )
 
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
 
+# Flat-extraction options for /extract, shared across invocations
+_EXTRACT_OPTS = {
+    "extract_flat": True,          # Don't download, just extract info
+    "playlist_items": "1-50",      # Limit to 50 items to avoid timeouts
+    "quiet": True,
+    "no_warnings": True,
+    "extractor_args": {"youtube": ["skip=dash,hls"]}
+}
+
+
 async def cmd_extract(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /extract command — scrape video links from a channel or playlist."""
     if not context.args:
@@ -487,14 +649,9 @@ async def cmd_extract(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     def _scrape_urls():
         import yt_dlp
-        opts = {
-            "extract_flat": True,          # Don't download, just extract info
-            "playlist_items": "1-50",      # Limit to 50 items to avoid timeouts
-            "quiet": True,
-            "no_warnings": True,
-            "extractor_args": {"youtube": ["skip=dash,hls"]}
-        }
-        with yt_dlp.YoutubeDL(opts) as ydl:
+        # YoutubeDL mutates the params dict it is given — hand it a
+        # shallow copy so the shared constant stays pristine
+        with yt_dlp.YoutubeDL(dict(_EXTRACT_OPTS)) as ydl:
             return ydl.extract_info(url, download=False)
 
     try:
@@ -523,16 +680,29 @@ async def cmd_extract(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await wait_msg.edit_text("❌ Tidak ada link valid yang bisa diekstrak.")
             return
 
-        # Send back in chunks to avoid Telegram message length limits
-        chunk_size = 20
         await wait_msg.edit_text(f"✅ Berhasil menemukan <b>{len(urls)}</b> video!\n\nSilakan copy-paste link di bawah ini ke bot:", parse_mode="HTML")
-        
-        for i in range(0, len(urls), chunk_size):
-            chunk = urls[i:i + chunk_size]
-            msg_text = "\n".join(chunk)
-            # Add small delay between messages to not trigger spam blocks
-            await asyncio.sleep(0.5)
-            await update.message.reply_text(msg_text, disable_web_page_preview=True)
+
+        # Chunk by character length, not item count — 50 URLs usually fit
+        # in a single 4096-char message. The AIORateLimiter handles any
+        # flood control, so no artificial sleep between sends.
+        full_text = "\n".join(urls)
+        if len(full_text) <= 4000:
+            await update.message.reply_text(full_text, disable_web_page_preview=True)
+        else:
+            chunk_lines: list[str] = []
+            chunk_len = 0
+            for link in urls:
+                if chunk_lines and chunk_len + len(link) + 1 > 4000:
+                    await update.message.reply_text(
+                        "\n".join(chunk_lines), disable_web_page_preview=True
+                    )
+                    chunk_lines, chunk_len = [], 0
+                chunk_lines.append(link)
+                chunk_len += len(link) + 1
+            if chunk_lines:
+                await update.message.reply_text(
+                    "\n".join(chunk_lines), disable_web_page_preview=True
+                )
 
     except Exception as e:
         logger.error(f"Error in /extract: {e}")
@@ -540,6 +710,112 @@ async def cmd_extract(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ─── Video/File Handler ────────────────────────────────────────────
 
+# Files up to this size are streamed from Telegram straight into the Drive
+# upload without touching disk (also the Bot API download cap).
+STREAM_UPLOAD_LIMIT = 20 * 1024 * 1024  # 20 MB
+
+# Built once — filters.Document.VIDEO walks an attribute chain on access
+VIDEO_FILTER = filters.VIDEO | filters.Document.VIDEO
+
+
+def _open_unlinked_staging():
+    """
+    Open an anonymous staging file in TEMP_DIR via O_TMPFILE (Linux only).
+
+    The file has no directory entry, so the kernel reclaims it as soon as
+    the fd closes — a crash can never leave a stray temp file behind.
+    Returns (fd, path-through-/proc) or None when unsupported.
+    """
+    flags = getattr(os, "O_TMPFILE", 0)
+    if not flags:
+        return None
+    try:
+        fd = os.open(str(config.TEMP_DIR), flags | os.O_RDWR, 0o600)
+    except OSError:
+        return None
+    return fd, f"/proc/self/fd/{fd}"
+
+
+async def _edit_status(status_msg, text: str, **kwargs):
+    """Edit the rolling status message; ignore 'message is not modified'."""
+    try:
+        await status_msg.edit_text(text, **kwargs)
+    except BadRequest as e:
+        logger.debug(f"Status edit skipped: {e}")
+
+
+# Pooled session for Telegram file-server downloads — back-to-back video
+# staging reuses the TLS connection instead of handshaking per file.
+# requests.Session is thread-safe for concurrent gets.
+_http_session = requests.Session()
+
+
+def _stage_telegram_file(file_url: str, local_path: str):
+    """
+    Stream a Telegram file to disk in 1 MB chunks.
+
+    Runs in a worker thread (via asyncio.to_thread) so neither the HTTPS
+    read nor the disk write blocks the event loop.
+    """
+    with _http_session.get(file_url, stream=True, timeout=300) as resp:
+        resp.raise_for_status()
+        with open(local_path, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+
+
+def _pipe_telegram_to_drive(
+    file_url: str, local_path: str, file_size: int, file_name: str
+) -> dict:
+    """
+    Stream a Telegram file into Google Drive (blocking — run via to_thread).
+
+    A producer thread stages bytes into local_path while the Drive
+    resumable upload reads the same file just behind it, so wall time is
+    roughly max(download, upload) instead of their sum.
+    """
+    done = threading.Event()
+    errors: list[Exception] = []
+
+    def _produce():
+        try:
+            _stage_telegram_file(file_url, local_path)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+
+    reader = TailingReader(local_path, file_size, done)
+    try:
+        result = get_drive().upload_stream(reader, file_name)
+    finally:
+        reader.close()
+        producer.join()
+
+    if errors:
+        raise errors[0]
+    return result
+
+
+def _safe_unlink(path):
+    """Delete a file, tolerating it already being gone (EAFP, one syscall)."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        logger.warning(f"Could not remove temp file (in use): {path}")
+
+
+async def _discard_temp_file(path):
+    """Remove a staging file off the event loop; no-op if already gone."""
+    if not path:
+        return
+    await asyncio.to_thread(_safe_unlink, path)
+
 
 async def handle_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle incoming video or document (video file)."""
@@ -566,9 +842,10 @@ async def handle_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # File size info
     size_mb = (file_size or 0) / (1024 * 1024)
 
-    import html
     fname_esc = html.escape(file_name)
-    await message.reply_text(
+    # One status message is sent here and edited as the pipeline advances,
+    # instead of a fresh reply per step
+    status = await message.reply_text(
         f"📥 <b>Menerima video:</b>\n"
         f"📄 <code>{fname_esc}</code>\n"
         f"📏 {size_mb:.1f} MB\n\n"
@@ -582,55 +859,95 @@ async def handle_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await message.reply_text(err, parse_mode="HTML")
         return
 
+    # Gate the heavy work so a burst of videos can't saturate bandwidth,
+    # disk and Groq quota all at once (user already got the ack above)
+    await limits.pipeline_bucket.acquire()
+    await limits.pipeline_semaphore.acquire()
+
+    local_path = None
+    staging_fd = None
+    metadata_task = None
     try:
-        # Step 1: Download from Telegram
-        local_path = str(config.TEMP_DIR / file_name)
+        # Groq only needs the filename and caption, so metadata generation
+        # runs concurrently with the whole Telegram → Drive transfer
+        from groq_metadata import generate_metadata
+        caption = message.caption or ""
+        metadata_task = asyncio.create_task(
+            asyncio.to_thread(generate_metadata, file_name, extra_context=caption)
+        )
 
+        # Step 1 + 2: Download from Telegram and upload to Google Drive.
+        # Small files are piped through memory so the bytes never hit disk;
+        # larger files fall back to staging in TEMP_DIR.
         tg_file = await context.bot.get_file(file.file_id)
-        await tg_file.download_to_drive(local_path)
 
-        logger.info(f"Downloaded from Telegram: {local_path}")
-        await message.reply_text("✅ Download selesai! Mengupload ke Drive...")
+        if file_size and file_size <= STREAM_UPLOAD_LIMIT:
+            buf = io.BytesIO()
+            await tg_file.download_to_memory(buf)
+            buf.seek(0)
 
-        # Step 2: Upload to Google Drive
-        drive_result = get_drive().upload(local_path)
-        await message.reply_text(
+            logger.info(f"Downloaded from Telegram (in-memory): {file_name}")
+            await _edit_status(status, "✅ Download selesai! Mengupload ke Drive...")
+
+            drive_result = await asyncio.to_thread(
+                get_drive().upload_stream, buf, file_name
+            )
+        else:
+            # TEMP_DIR can be wiped at runtime on ephemeral hosts
+            config.TEMP_DIR.mkdir(exist_ok=True)
+
+            staging = _open_unlinked_staging()
+            if staging is not None:
+                staging_fd, local_path = staging
+            else:
+                local_path = str(config.TEMP_DIR / file_name)
+
+            if tg_file.file_path and tg_file.file_path.startswith("http") and file_size:
+                # Download and Drive upload overlap: the resumable upload
+                # reads the staging file just behind the Telegram download
+                await _edit_status(status, "⏳ Streaming ke Drive...")
+                drive_result = await asyncio.to_thread(
+                    _pipe_telegram_to_drive,
+                    tg_file.file_path, local_path, file_size, file_name,
+                )
+            else:
+                await tg_file.download_to_drive(local_path)
+                logger.info(f"Downloaded from Telegram: {local_path}")
+                await _edit_status(status, "✅ Download selesai! Mengupload ke Drive...")
+                drive_result = await asyncio.to_thread(
+                    get_drive().upload, local_path, name=file_name
+                )
+        await _edit_status(
+            status,
             f"✅ Uploaded ke Drive!\n"
             f"🔗 {drive_result['web_view_link']}\n\n"
-            f"🧠 Generating metadata via Groq AI...",
+            f"🧠 Menunggu metadata dari Groq AI...",
         )
 
-        # Step 3: Add to Google Sheets
-        user_id = update.effective_user.id
-        active_ch = _get_active_channel(user_id)
-        active_platform = _get_active_platform(user_id)
-        
+        # Step 3: Collect the metadata that has been generating since step 1
+        metadata = await metadata_task
+
+        # Step 4: Add to Google Sheets — metadata is ready, so the entry
+        # lands in a single write instead of an add + update pair
+        active_ch = _get_active_channel(context)
+        active_platform = _get_active_platform(context)
+
         sheets = get_sheets()
-        row = sheets.add_video(
+        row = await asyncio.to_thread(
+            sheets.add_video_full,
             filename=file_name,
             drive_link=drive_result["web_view_link"],
+            title=metadata["title"],
+            description=metadata["description"],
+            tags=metadata["tags"],
             channel=active_ch,
             platform=active_platform
         )
 
-        # Step 4: Generate metadata via Groq
-        from groq_metadata import generate_metadata
-        caption = message.caption or ""
-        metadata = generate_metadata(file_name, extra_context=caption)
-        sheets.update_metadata(
-            row,
-            metadata["title"],
-            metadata["description"],
-            metadata["tags"],
-            platform=active_platform
+        # Step 5: Check if we can upload now or need to schedule
+        summary = await asyncio.to_thread(
+            sheets.get_queue_summary, platform=active_platform
         )
-
-        # Step 5: Clean up temp file
-        if os.path.exists(local_path):
-            os.remove(local_path)
-
-        # Step 6: Check if we can upload now or need to schedule
-        summary = sheets.get_queue_summary(platform=active_platform)
         if summary["remaining_today"] > 0:
             status_msg = (
                 f"📺 Video siap upload ke {active_platform.title()}!\n"
@@ -638,73 +955,192 @@ async def handle_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"📊 Sisa slot hari ini: {summary['remaining_today']}"
             )
         else:
-            from datetime import datetime, timezone, timedelta
-            tomorrow = (
-                datetime.now(timezone(timedelta(hours=7)))
-                .strftime("%Y-%m-%d")
-            )
-            sheets.set_scheduled_date(row, tomorrow)
+            # add_video_full already stamped the row with tomorrow's date
+            # when today's quota is gone — no extra Sheets write needed
+            tomorrow = (datetime.now(WIB) + timedelta(days=1)).strftime("%Y-%m-%d")
             status_msg = (
                 f"📅 Limit harian tercapai!\n"
                 f"Video dijadwalkan untuk: {tomorrow}"
             )
 
-        import html
-        fname_esc = html.escape(file_name)
-        title_esc = html.escape(metadata['title'])
-        tags_esc = html.escape(metadata['tags'])
-        
-        await message.reply_text(
-            f"✅ <b>Pipeline selesai!</b>\n\n"
-            f"📄 File: <code>{fname_esc}</code>\n"
-            f"📝 Title: {title_esc}\n"
-            f"🏷️ Tags: {tags_esc}\n\n"
-            f"{status_msg}\n\n"
-            f"💡 Kamu bisa edit metadata di Google Sheets sebelum upload.",
+        await _edit_status(
+            status,
+            _PIPELINE_DONE_TPL.format(
+                file_name=html.escape(file_name),
+                title=html.escape(metadata["title"]),
+                tags=html.escape(metadata["tags"]),
+                status_msg=status_msg,
+            ),
             parse_mode="HTML",
         )
 
     except Exception as e:
         logger.error(f"Error processing video: {e}", exc_info=True)
         await message.reply_text(f"❌ Error: {e}")
-
-        # Clean up on error
-        try:
-            if os.path.exists(local_path):
-                os.remove(local_path)
-        except PermissionError:
-            logger.warning(f"Could not remove temp file (in use): {local_path}")
+        if metadata_task is not None:
+            if metadata_task.done():
+                metadata_task.exception()  # retrieve, silencing the warning
+            else:
+                metadata_task.cancel()
+    finally:
+        limits.pipeline_semaphore.release()
+        # Clean up staging on both success and error paths: closing an
+        # O_TMPFILE fd discards the file; named files need the unlink
+        if staging_fd is not None:
+            os.close(staging_fd)
+        else:
+            await _discard_temp_file(local_path)
 
 
 # ─── URL/Link Handler ──────────────────────────────────────────────────────
 
-# Supported URL patterns
+# Supported URL host patterns — one entry per site, joined into a single
+# alternation below. Keeping them as a tuple makes adding a site a
+# one-line change and keeps each branch a short literal prefix, so the
+# regex engine rejects non-matching hosts after a few characters instead
+# of backtracking through free-form sub-patterns.
+SUPPORTED_URL_HOSTS = (
+    r'youtube\.com/(?:watch|shorts)',
+    r'youtu\.be/',
+    r'tiktok\.com/',
+    r'vm\.tiktok\.com/',
+    r'vt\.tiktok\.com/',
+    r'instagram\.com/(?:reel|p)/',
+    r'twitter\.com/[^\s/]+/status/',
+    r'x\.com/[^\s/]+/status/',
+    r'facebook\.com/[^\s]+/videos/',
+    r'douyin\.com/',
+    r'v\.douyin\.com/',
+    r'xiaohongshu\.com/',
+    r'xhslink\.com/',
+    r'bilibili\.com/',
+    r'b23\.tv/',
+    r'kuaishou\.com/',
+    r'v\.kuaishou\.com/',
+    r'threads\.net/',
+)
+
 URL_PATTERN = re.compile(
     r'(https?://(?:www\.)?'
-    r'(?:youtube\.com/(?:watch|shorts)|youtu\.be/|'
-    r'tiktok\.com/|vm\.tiktok\.com/|vt\.tiktok\.com/|'
-    r'instagram\.com/(?:reel|p)/|'
-    r'twitter\.com/.+/status/|x\.com/.+/status/|'
-    r'facebook\.com/.+/videos/|'
-    r'douyin\.com/|v\.douyin\.com/|'
-    r'xiaohongshu\.com/|xhslink\.com/|'
-    r'bilibili\.com/|b23\.tv/|'
-    r'kuaishou\.com/|v\.kuaishou\.com/|'
-    r'threads\.net/)'
+    r'(?:' + '|'.join(SUPPORTED_URL_HOSTS) + r')'
     r'[^\s]+)',
     re.IGNORECASE
 )
 
 
+class _HasHTTPFilter(filters.MessageFilter):
+    """
+    Near-free substring prefilter in front of the URL regex.
+
+    PTB evaluates handler filters on every message; '&' short-circuits,
+    so with this first the regex never runs on plain chatter.
+    """
+
+    def filter(self, message):
+        return bool(message.text and "http" in message.text)
+
+
+HAS_HTTP_FILTER = _HasHTTPFilter(name="bot.has_http")
+
+
+# Base yt-dlp options, built once per process (including the cookie-file
+# probe, which used to stat the filesystem on every URL)
+_ydl_base_opts: dict | None = None
+
+
+def _get_ydl_opts() -> dict:
+    """Build (once) and return the shared yt-dlp option dict."""
+    global _ydl_base_opts
+    if _ydl_base_opts is None:
+        opts = {
+            'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+            'merge_output_format': 'mp4',
+            'outtmpl': str(config.TEMP_DIR / '%(title)s.%(ext)s'),
+            'quiet': True,
+            'no_warnings': True,
+            'max_filesize': 500 * 1024 * 1024,  # 500 MB max
+            'extractor_args': {
+                'youtube': [
+                    'player_client=android,ios',
+                    'player_skip=configs,webpage'
+                ],
+                'tiktok': [
+                    'app_version=32.1.3',
+                    'manifest_app_version=32.1.3'
+                ]
+            },
+            'http_headers': {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            }
+        }
+
+        # Check for cookies file to bypass YouTube's datacenter block
+        cookies_paths = [
+            "www.youtube.com_cookies.txt",  # Local
+            "/etc/secrets/www.youtube.com_cookies.txt"  # Render Secret File
+        ]
+        for cp in cookies_paths:
+            if os.path.exists(cp):
+                opts['cookiefile'] = cp
+                logger.info(f"Using yt-dlp cookies file: {cp}")
+                break
+
+        _ydl_base_opts = opts
+    return _ydl_base_opts
+
+
+def _ydl_fetch(url: str, ydl_opts: dict) -> tuple[dict, str]:
+    """
+    Download a video with yt-dlp (blocking — run via asyncio.to_thread).
+
+    Retries connection resets up to 3 times, forcing IPv4 on retry.
+
+    Returns:
+        (info_dict, local_path)
+    """
+    import yt_dlp
+
+    # Shallow-copy so the retry fallback below never mutates the shared opts
+    ydl_opts = dict(ydl_opts)
+
+    attempts = 3
+    for attempt in range(1, attempts + 1):
+        try:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info_dict = ydl.extract_info(url, download=True)
+                download_path = ydl.prepare_filename(info_dict)
+                return info_dict, download_path
+        except Exception as e:
+            if "ConnectionResetError" in str(e) or "Connection aborted" in str(e):
+                logger.warning(f"Connection reset on attempt {attempt}, retrying...")
+                # Fallback to IPv4 on retry to help avoid connection resets
+                ydl_opts["source_address"] = "0.0.0.0"
+                if attempt == attempts:
+                    raise e
+            else:
+                raise e
+
+
 async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle incoming URL — download video via yt-dlp then pipeline."""
     message = update.message
     text = message.text or ""
 
-    # Extract URL from message
-    matches = list(URL_PATTERN.finditer(text))
-    if not matches:
-        return  # Not a supported video URL
+    # The Regex filter already scanned this text and stashed its match in
+    # context.matches — reuse it, and only rescan the tail for the rare
+    # message carrying more than one link
+    if context.matches:
+        first = context.matches[0]
+    else:
+        first = URL_PATTERN.search(text)
+        if not first:
+            return  # Not a supported video URL
+    if "http" in text[first.end():]:
+        # Lazy: each iteration awaits a full download anyway, so there is
+        # no point materializing every match up front
+        matches = itertools.chain([first], URL_PATTERN.finditer(text, first.end()))
+    else:
+        matches = iter((first,))  # single-URL fast path, no rescan
 
     # Check Google config
     err = _google_not_configured()
@@ -715,7 +1151,6 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
     for match in matches:
         url = match.group(0)
 
-        import html
         url_esc = html.escape(url)
         await message.reply_text(
             f"🔗 <b>Link detected!</b>\n"
@@ -724,66 +1159,23 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode="HTML",
         )
 
+        # Same gate as handle_video: the user already got the ack above,
+        # so a burst of links queues here instead of saturating the host
+        await limits.pipeline_bucket.acquire()
+        await limits.pipeline_semaphore.acquire()
+
         local_path = None
         try:
-            import yt_dlp
-
-            # yt-dlp options: best quality, mp4 format, bypass Android client
-            ydl_opts = {
-                'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
-                'merge_output_format': 'mp4',
-                'outtmpl': str(config.TEMP_DIR / '%(title)s.%(ext)s'),
-                'quiet': True,
-                'no_warnings': True,
-                'max_filesize': 500 * 1024 * 1024,  # 500 MB max
-                'extractor_args': {
-                    'youtube': [
-                        'player_client=android,ios',
-                        'player_skip=configs,webpage'
-                    ],
-                    'tiktok': [
-                        'app_version=32.1.3',
-                        'manifest_app_version=32.1.3'
-                    ]
-                },
-                'http_headers': {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                }
-            }
+            # Download in a worker thread so the event loop stays free
+            info, local_path = await asyncio.to_thread(
+                _ydl_fetch, url, _get_ydl_opts()
+            )
 
-            # Check for cookies file to bypass YouTube's datacenter block
-            cookies_paths = [
-                "www.youtube.com_cookies.txt",  # Local
-                "/etc/secrets/www.youtube.com_cookies.txt"  # Render Secret File
-            ]
-            for cp in cookies_paths:
-                if os.path.exists(cp):
-                    ydl_opts['cookiefile'] = cp
-                    logger.info(f"Using yt-dlp cookies file: {cp}")
-                    break
-
-            # Download using asyncio.to_thread to prevent blocking main thread
-            def _download_video():
-                attempts = 3
-                for attempt in range(1, attempts + 1):
-                    try:
-                        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                            info_dict = ydl.extract_info(url, download=True)
-                            download_path = ydl.prepare_filename(info_dict)
-                            return info_dict, download_path
-                    except Exception as e:
-                        if "ConnectionResetError" in str(e) or "Connection aborted" in str(e):
-                            logger.warning(f"Connection reset on attempt {attempt}, retrying...")
-                            # Fallback to IPv4 on retry to help avoid connection resets
-                            ydl_opts["source_address"] = "0.0.0.0"
-                            if attempt == attempts:
-                                raise e
-                        else:
-                            raise e
-
-            info, local_path = await asyncio.to_thread(_download_video)
-
-            if not os.path.exists(local_path):
+            # One stat() covers both the existence check and the size
+            downloaded = Path(local_path)
+            try:
+                size_mb = downloaded.stat().st_size / (1024 * 1024)
+            except FileNotFoundError:
                 await message.reply_text("❌ Download gagal — file tidak ditemukan.")
                 continue
 
@@ -792,8 +1184,7 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
             video_tags = info.get('tags', [])
             duration = info.get('duration', 0)
 
-            file_name = os.path.basename(local_path)
-            size_mb = os.path.getsize(local_path) / (1024 * 1024)
+            file_name = downloaded.name
 
             duration_str = ""
             if duration:
@@ -809,25 +1200,8 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode="HTML",
             )
 
-            # Continue pipeline: Drive → Sheets → Groq
-            drive_result = get_drive().upload(local_path)
-            await message.reply_text(
-                f"✅ Uploaded ke Drive!\n"
-                f"🔗 {drive_result['web_view_link']}\n\n"
-                f"🧠 Generating metadata via Groq AI...",
-            )
-
-            user_id = update.effective_user.id
-            active_ch = _get_active_channel(user_id)
-            active_platform = _get_active_platform(user_id)
-            
-            sheets = get_sheets()
-            row = sheets.add_video(
-                filename=file_name,
-                drive_link=drive_result["web_view_link"],
-                channel=active_ch,
-                platform=active_platform
-            )
+            active_ch = _get_active_channel(context)
+            active_platform = _get_active_platform(context)
 
             # Form rich context for Groq AI to avoid hallucination
             context_parts = [f"Original title: {video_title}"]
@@ -840,31 +1214,44 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if video_tags:
                 tags_str = ", ".join(video_tags[:20]) # Limit to first 20 tags
                 context_parts.append(f"Original tags: {tags_str}")
-                
+
             rich_context = "\n".join(context_parts)
 
-            # Use original rich context for Groq
+            # Drive upload and Groq metadata are independent network
+            # calls — run them concurrently
             from groq_metadata import generate_metadata
-            metadata = generate_metadata(
-                file_name, extra_context=rich_context
+            drive_result, metadata = await asyncio.gather(
+                asyncio.to_thread(get_drive().upload, local_path),
+                asyncio.to_thread(
+                    generate_metadata, file_name, extra_context=rich_context
+                ),
+            )
+            await message.reply_text(
+                f"✅ Uploaded ke Drive!\n"
+                f"🔗 {drive_result['web_view_link']}\n\n"
+                f"🧠 Metadata Groq AI siap!",
             )
-            sheets.update_metadata(
-                row,
-                metadata["title"],
-                metadata["description"],
-                metadata["tags"],
+
+            # Sheets entry lands in one write with metadata populated
+            sheets = get_sheets()
+            row = await asyncio.to_thread(
+                sheets.add_video_full,
+                filename=file_name,
+                drive_link=drive_result["web_view_link"],
+                title=metadata["title"],
+                description=metadata["description"],
+                tags=metadata["tags"],
+                channel=active_ch,
                 platform=active_platform
             )
 
             # Clean up temp
-            try:
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-            except PermissionError:
-                pass
+            await _discard_temp_file(local_path)
 
             # Status
-            summary = sheets.get_queue_summary(platform=active_platform)
+            summary = await asyncio.to_thread(
+                sheets.get_queue_summary, platform=active_platform
+            )
             sched = get_scheduler()
             next_time = sched.get_next_upload_time()
 
@@ -881,28 +1268,22 @@ async def handle_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
 
             # Step 5: Notify user via Telegram
-            fname = html.escape(file_name)
-            title_esc = html.escape(metadata["title"])
-            tags_esc = html.escape(metadata["tags"])
-            
             await message.reply_text(
-                f"✅ <b>Pipeline selesai!</b>\n\n"
-                f"📄 File: <code>{fname}</code>\n"
-                f"📝 Title: {title_esc}\n"
-                f"🏷️ Tags: {tags_esc}\n\n"
-                f"{status_msg}\n\n"
-                f"💡 Kamu bisa edit metadata di Google Sheets sebelum upload.",
+                _PIPELINE_DONE_TPL.format(
+                    file_name=html.escape(file_name),
+                    title=html.escape(metadata["title"]),
+                    tags=html.escape(metadata["tags"]),
+                    status_msg=status_msg,
+                ),
                 parse_mode="HTML",
             )
 
         except Exception as e:
             logger.error(f"Error processing URL: {e}", exc_info=True)
             await message.reply_text(f"❌ Error for {url_esc}: {e}", parse_mode="HTML")
-            try:
-                if local_path and os.path.exists(local_path):
-                    os.remove(local_path)
-            except (PermissionError, Exception):
-                pass
+            await _discard_temp_file(local_path)
+        finally:
+            limits.pipeline_semaphore.release()
 
 # ─── Scheduled Upload Job ──────────────────────────────────────────
 
@@ -912,94 +1293,192 @@ async def scheduled_upload_job(context: ContextTypes.DEFAULT_TYPE):
     logger.info("Running scheduled upload job...")
 
     try:
-        # Run YouTube upload in a background thread to prevent blocking the scheduler/bot
-        results = await asyncio.to_thread(get_scheduler().process_queue)
+        sched = get_scheduler()
+        batch = await asyncio.to_thread(sched.plan_queue_batch)
+
+        # At most one video per platform per slot — run the platforms'
+        # uploads concurrently in worker threads instead of back-to-back
+        results = await asyncio.gather(
+            *(asyncio.to_thread(sched.upload_one, v) for v in batch)
+        ) if batch else []
 
         chat_id = config.TELEGRAM_CHAT_ID
         if not chat_id:
             logger.warning("TELEGRAM_CHAT_ID not set, skipping notifications.")
-            return
+            return results
 
-        for r in results:
-            if r["success"]:
-                import html
-                fname_esc = html.escape(r['filename'])
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=(
-                        f"✅ <b>Auto-uploaded!</b>\n"
-                        f"📹 <code>{fname_esc}</code>\n"
-                        f"🔗 {r['youtube_link']}"
-                    ),
-                    parse_mode="HTML",
-                )
-            else:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=(
-                        f"❌ **Auto-upload failed:** `{r['filename']}`\n"
-                        f"Error: {r.get('error', 'Unknown')}"
-                    ),
-                    parse_mode="Markdown",
-                )
+        if not results:
+            return results
+
+        # One digest message for the whole batch instead of N sends
+        digest = "\n\n".join(_format_result(r) for r in results)
+        for start in range(0, len(digest), 4000):
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=digest[start:start + 4000],
+                parse_mode="HTML",
+                disable_web_page_preview=True,
+            )
+
+        return results
 
     except Exception as e:
         logger.error(f"Scheduled job error: {e}", exc_info=True)
+        return []
+
+
+# Ceiling for the force-poll back-off below
+_POLL_MAX_SECONDS = 30 * 60
+
+
+async def polled_upload_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    SCHEDULER_FORCE_POLL variant of the upload job with adaptive back-off.
+
+    Every empty run doubles the wait before the next poll (capped at 30
+    minutes); any run that uploads something snaps back to the base
+    interval. An idle queue stops burning Sheets quota every few minutes
+    while bursts still get polled at the configured rate.
+    """
+    results = await scheduled_upload_job(context)
+
+    base = config.SCHEDULER_INTERVAL_MINUTES * 60
+    prev = context.job.data if isinstance(context.job.data, (int, float)) else base
+    interval = base if results else min(prev * 2, _POLL_MAX_SECONDS)
+    if interval != prev:
+        logger.info(f"Queue poll back-off: next run in {interval / 60:.0f} min")
+
+    context.job_queue.run_once(
+        polled_upload_job, when=interval, data=interval, name="upload-poll"
+    )
+
+
+# Temp files older than this are leftovers from crashed pipelines
+_TEMP_MAX_AGE_SECONDS = 60 * 60
+
+
+def _sweep_temp_dir():
+    """Unlink stale files in TEMP_DIR (runs in a worker thread)."""
+    cutoff = time.time() - _TEMP_MAX_AGE_SECONDS
+    removed = 0
+    try:
+        entries = list(os.scandir(config.TEMP_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except OSError:
+            continue  # in use or already gone — next sweep gets it
+    if removed:
+        logger.info(f"Temp sweep removed {removed} stale file(s)")
+
+
+async def temp_sweep_job(context: ContextTypes.DEFAULT_TYPE):
+    """Hourly cleanup of temp files orphaned by crashes mid-pipeline."""
+    await asyncio.to_thread(_sweep_temp_dir)
 
 
 # ─── Save Chat ID ──────────────────────────────────────────────────
 
 
+# Serializes sidecar writers across concurrent handlers
+_state_lock = asyncio.Lock()
+
+# Chats already persisted this process lifetime. Without this, two chats
+# talking to the bot alternately would rewrite the sidecar on every
+# message, since each one differs from whatever TELEGRAM_CHAT_ID holds.
+_saved_chat_ids: set[str] = {config.TELEGRAM_CHAT_ID} if config.TELEGRAM_CHAT_ID else set()
+
+
+def _persist_chat_id(chat_id: str):
+    """Write the chat id to the state sidecar atomically (worker thread).
+
+    A tiny dedicated file instead of rewriting .env: the write is O(1)
+    regardless of how many settings .env accumulates, and a botched
+    write can never corrupt real configuration.
+    """
+    import json
+
+    state_path = config.STATE_FILE
+    tmp_path = state_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps({"chat_id": chat_id}))
+    os.replace(tmp_path, state_path)
+
+
 async def save_chat_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Middleware to save the chat ID for scheduled notifications."""
     chat_id = str(update.effective_chat.id)
 
-    if config.TELEGRAM_CHAT_ID != chat_id:
-        config.TELEGRAM_CHAT_ID = chat_id
+    if chat_id in _saved_chat_ids:
+        return  # common case: already saved, skip all disk I/O
 
-        # Also save to .env for persistence
-        env_path = config.BASE_DIR / ".env"
-        if env_path.exists():
-            content = env_path.read_text()
-            if "TELEGRAM_CHAT_ID=" in content:
-                lines = content.split("\n")
-                lines = [
-                    f"TELEGRAM_CHAT_ID={chat_id}" if l.startswith("TELEGRAM_CHAT_ID=") else l
-                    for l in lines
-                ]
-                env_path.write_text("\n".join(lines))
-            else:
-                with open(env_path, "a") as f:
-                    f.write(f"\nTELEGRAM_CHAT_ID={chat_id}\n")
+    async with _state_lock:
+        if chat_id in _saved_chat_ids:
+            return  # another handler saved it while we waited
+
+        _saved_chat_ids.add(chat_id)
+        config.TELEGRAM_CHAT_ID = chat_id
+        await asyncio.to_thread(_persist_chat_id, chat_id)
 
 
 # ─── Health Check Server (for Render) ──────────────────────────────
 
 
-def _start_health_server():
-    """Start a simple HTTP server for Render health checks."""
-    import threading
-    from http.server import HTTPServer, BaseHTTPRequestHandler
+async def _handle_health(reader, writer):
+    """Answer any request with a tiny 200 — enough for Render's probe."""
+    try:
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+        pass
+    body = b"YT Upload Bot is running!"
+    writer.write(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: text/plain\r\n"
+        b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+        b"Connection: close\r\n\r\n" + body
+    )
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
 
+async def _start_health_server():
+    """Serve Render health checks/pings from the bot's own event loop."""
     port = int(os.environ.get("PORT", "10000"))
+    try:
+        await asyncio.start_server(_handle_health, "0.0.0.0", port)
+        logger.info(f"Health check server running on port {port}")
+    except OSError as e:
+        logger.warning(f"Could not start health server on port {port}: {e}")
 
-    class Handler(BaseHTTPRequestHandler):
-        def do_GET(self):
-            self.send_response(200)
-            self.send_header("Content-Type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"YT Upload Bot is running!")
 
-        def log_message(self, format, *args):
-            pass  # Suppress HTTP logs
+# ─── Main ──────────────────────────────────────────────────────────
 
-    server = HTTPServer(("0.0.0.0", port), Handler)
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
-    thread.start()
-    logger.info(f"Health check server running on port {port}")
 
+async def _post_init(app):
+    """Configure the event loop once PTB has built it."""
+    # Size the default executor so several asyncio.to_thread calls
+    # (Drive, Sheets, Groq, yt-dlp) can run in parallel
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=8)
+    )
 
-# ─── Main ──────────────────────────────────────────────────────────
+    # Health/keep-alive endpoint for Render, served from this same loop
+    # instead of a dedicated Flask/HTTPServer thread
+    await _start_health_server()
+
+    # Warm up the Google clients so the OAuth handshake happens at
+    # startup instead of inside the first user's handler
+    if _google_not_configured() is None:
+        try:
+            await _ensure_clients()
+            logger.info("Google API clients warmed up.")
+        except Exception as e:
+            logger.warning(f"Client warmup failed (will retry lazily): {e}")
 
 
 def main():
@@ -1008,13 +1487,23 @@ def main():
         logger.error("TELEGRAM_BOT_TOKEN not set! Check your .env file.")
         return
 
-    # Start health check server (for Render)
-    if os.environ.get("RENDER"):
-        _start_health_server()
-
     logger.info("Starting Video Upload Pipeline Bot...")
 
-    app = ApplicationBuilder().token(config.TELEGRAM_BOT_TOKEN).build()
+    # Persist user_data (active channel/platform) across restarts, so a
+    # deploy doesn't silently reset everyone to the default channel
+    persistence = PicklePersistence(filepath=config.BASE_DIR / "bot_state.pkl")
+
+    app = (
+        ApplicationBuilder()
+        .token(config.TELEGRAM_BOT_TOKEN)
+        .persistence(persistence)
+        .concurrent_updates(config.MAX_CONCURRENT_UPDATES)
+        # Queue outgoing API calls against Telegram's flood limits
+        # instead of getting RetryAfter errors on bursty queue drains
+        .rate_limiter(AIORateLimiter())
+        .post_init(_post_init)
+        .build()
+    )
 
     # Command handlers
     app.add_handler(CommandHandler("start", cmd_start))
@@ -1026,17 +1515,15 @@ def main():
     app.add_handler(CommandHandler("platform", cmd_platform))
     app.add_handler(CommandHandler("ask", cmd_ask))
     app.add_handler(CommandHandler("extract", cmd_extract))
-    app.add_handler(CallbackQueryHandler(ask_callback, pattern="^save_idea$"))
+    app.add_handler(CallbackQueryHandler(ask_callback, pattern="^save_idea(:|$)"))
 
     # Video / file handler
-    app.add_handler(
-        MessageHandler(filters.VIDEO | filters.Document.VIDEO, handle_video)
-    )
+    app.add_handler(MessageHandler(VIDEO_FILTER, handle_video))
 
     # URL handler (YouTube, TikTok, Instagram, Twitter/X)
     app.add_handler(
         MessageHandler(
-            filters.TEXT & filters.Regex(URL_PATTERN) & ~filters.COMMAND,
+            filters.TEXT & HAS_HTTP_FILTER & filters.Regex(URL_PATTERN) & ~filters.COMMAND,
             handle_url,
         )
     )
@@ -1047,21 +1534,43 @@ def main():
         group=1,
     )
 
-    # Scheduled upload job
-    if config.SCHEDULER_INTERVAL_MINUTES > 0:
-        job_queue = app.job_queue
-        job_queue.run_repeating(
-            scheduled_upload_job,
-            interval=config.SCHEDULER_INTERVAL_MINUTES * 60,
-            first=60,  # First run after 1 minute
+    # Scheduled upload job — one wakeup per viral slot instead of a
+    # polling tick that hits the Sheets API even when no window is near
+    job_queue = app.job_queue
+
+    # Hourly sweep of temp files orphaned by crashed pipelines
+    job_queue.run_repeating(temp_sweep_job, interval=3600, first=300, name="temp-sweep")
+    if config.SCHEDULER_INTERVAL_MINUTES <= 0:
+        # 0 means auto-upload off — honored by both scheduler modes
+        logger.info("Auto-upload scheduler disabled (SCHEDULER_INTERVAL_MINUTES=0)")
+    elif config.SCHEDULER_FORCE_POLL:
+        # Self-rescheduling job: backs off while the queue is empty
+        job_queue.run_once(
+            polled_upload_job,
+            when=60,  # First run after 1 minute
+            data=config.SCHEDULER_INTERVAL_MINUTES * 60,
+            name="upload-poll",
         )
         logger.info(
-            f"Scheduler enabled: every {config.SCHEDULER_INTERVAL_MINUTES} minutes"
+            f"Scheduler polling every {config.SCHEDULER_INTERVAL_MINUTES} minutes"
+            f" (adaptive back-off up to {_POLL_MAX_SECONDS // 60})"
+        )
+    else:
+        for time_str in config.UPLOAD_SCHEDULE_HOURS:
+            try:
+                h, m = map(int, time_str.split(":"))
+            except ValueError:
+                logger.warning(f"Skipping invalid schedule time: {time_str!r}")
+                continue
+            job_queue.run_daily(
+                scheduled_upload_job,
+                time=dt_time(hour=h, minute=m, tzinfo=config.WIB),
+                name=f"upload-{h:02d}{m:02d}",
+            )
+        logger.info(
+            f"Scheduler set for daily slots: "
+            f"{', '.join(config.UPLOAD_SCHEDULE_HOURS)} WIB"
         )
-
-    logger.info("Starting keep-alive web server for Render...")
-    import keep_alive
-    keep_alive.keep_alive()
 
     logger.info("Bot is running! Press Ctrl+C to stop.")
     app.run_polling(drop_pending_updates=True)
@@ -1,6 +1,27 @@
-import os, requests
+"""Quick check of the FB token and its attached Pages, in one run."""
+import asyncio
+import os
+
+import requests
 from dotenv import load_dotenv
+
 load_dotenv()
 token = os.getenv('FB_PAGE_ACCESS_TOKEN')
-res = requests.get(f'https://graph.facebook.com/v19.0/me?fields=id,name,permissions&access_token={token}').json()
-print("FB Token Info:", res)
+
+
+async def main():
+    with requests.Session() as s:
+        # Two independent Graph calls — overlap them in worker threads
+        me, pages = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: s.get(f'https://graph.facebook.com/v19.0/me?fields=id,name,permissions&access_token={token}').json()
+            ),
+            asyncio.to_thread(
+                lambda: s.get(f'https://graph.facebook.com/v19.0/me/accounts?access_token={token}').json()
+            ),
+        )
+    print("FB Token Info:", me)
+    print("Attached Pages:", pages)
+
+
+asyncio.run(main())
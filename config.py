@@ -3,14 +3,18 @@ Configuration module — loads environment variables and defines constants.
 """
 import os
 from pathlib import Path
-from datetime import timezone, timedelta
+from types import MappingProxyType
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 
-# Load .env file
-load_dotenv()
+# Parse .env only when the environment isn't already configured —
+# container deploys set real env vars and can skip the disk read
+if not os.getenv("TELEGRAM_BOT_TOKEN"):
+    load_dotenv(override=False)
 
-# Timezone WIB (UTC+7)
-WIB = timezone(timedelta(hours=7))
+# Timezone WIB (UTC+7) — the zoneinfo object is cached process-wide,
+# unlike rebuilding timezone(timedelta(hours=7)) at every use site
+WIB = ZoneInfo("Asia/Jakarta")
 
 # === Paths ===
 BASE_DIR = Path(__file__).parent
@@ -22,9 +26,23 @@ TEMP_DIR.mkdir(exist_ok=True)
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 
+# Runtime state sidecar — written by the bot (e.g. the learned chat id)
+# so .env itself never gets rewritten at runtime. The env var, when set,
+# takes precedence.
+STATE_FILE = BASE_DIR / "state.json"
+if not TELEGRAM_CHAT_ID:
+    try:
+        import json
+        TELEGRAM_CHAT_ID = str(json.loads(STATE_FILE.read_text()).get("chat_id", ""))
+    except (FileNotFoundError, ValueError, OSError):
+        pass
+
 # === Groq ===
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = "llama-3.3-70b-versatile"
+# Fast tier for short structured outputs (metadata JSON) — much lower
+# time-to-first-token than the 70B model, and the output is tiny anyway
+GROQ_MODEL_FAST = os.getenv("GROQ_MODEL_FAST", "llama-3.1-8b-instant")
 
 # === Google Service Account ===
 GOOGLE_SERVICE_ACCOUNT_FILE = os.getenv(
@@ -38,8 +56,8 @@ GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID", "")
 # === Google Sheets ===
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "")
 
-# Sheet column mapping (1-indexed)
-SHEET_COLUMNS = {
+# Sheet column mapping (1-indexed, read-only)
+SHEET_COLUMNS = MappingProxyType({
     "timestamp": 1,
     "filename": 2,
     "drive_link": 3,
@@ -50,7 +68,7 @@ SHEET_COLUMNS = {
     "youtube_link": 8,
     "scheduled_date": 9,
     "channel": 10,
-}
+})
 
 # === YouTube ===
 YOUTUBE_CLIENT_SECRETS_FILE = os.getenv(
@@ -66,20 +84,43 @@ _channels_raw = os.getenv("YOUTUBE_CHANNELS", "default")
 YOUTUBE_CHANNELS = [c.strip() for c in _channels_raw.split(",")]
 DEFAULT_CHANNEL = YOUTUBE_CHANNELS[0]
 
+# Token paths for the configured channels, built once at import
+_TOKEN_FILES = {
+    c: str(CREDENTIALS_DIR / f"youtube_token_{c.lower().replace(' ', '_')}.json")
+    for c in YOUTUBE_CHANNELS
+}
+
 def get_channel_token_file(channel_name: str) -> str:
     """Get the token file path for a specific channel."""
-    safe_name = channel_name.lower().replace(" ", "_")
-    return str(CREDENTIALS_DIR / f"youtube_token_{safe_name}.json")
+    try:
+        return _TOKEN_FILES[channel_name]
+    except KeyError:
+        # Channel not in YOUTUBE_CHANNELS (e.g. hand-edited sheet row)
+        safe_name = channel_name.lower().replace(" ", "_")
+        return str(CREDENTIALS_DIR / f"youtube_token_{safe_name}.json")
 
 # === Facebook ===
 FB_PAGE_ACCESS_TOKEN = os.getenv("FB_PAGE_ACCESS_TOKEN", "")
 FB_PAGE_ID = os.getenv("FB_PAGE_ID", "")
 
+# === Concurrency limits ===
+# Max video pipelines running at once, and how many may start per minute
+MAX_CONCURRENT_VIDEOS = int(os.getenv("MAX_CONCURRENT_VIDEOS", "3"))
+VIDEO_RATE_PER_MINUTE = int(os.getenv("VIDEO_RATE_PER_MINUTE", "6"))
+
+# How many Telegram updates PTB may process in parallel. The pipeline
+# semaphore above still caps the heavy video work within this.
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "16"))
+
 # === Scheduler ===
 MAX_UPLOADS_PER_DAY_YOUTUBE = int(os.getenv("MAX_UPLOADS_PER_DAY_YOUTUBE", "6"))
 MAX_UPLOADS_PER_DAY_FACEBOOK = int(os.getenv("MAX_UPLOADS_PER_DAY_FACEBOOK", "6"))
 SCHEDULER_INTERVAL_MINUTES = int(os.getenv("SCHEDULER_INTERVAL_MINUTES", "5"))
 
+# Set to "1" to fall back to interval polling instead of one scheduled
+# wakeup per upload slot
+SCHEDULER_FORCE_POLL = os.getenv("SCHEDULER_FORCE_POLL", "") == "1"
+
 # === Upload Schedule (Viral Hours WIB) ===
 # Default: 21:00, 00:00, 03:00 WIB — targeting US/EU peak hours
 # Format: comma-separated "HH:MM" in WIB
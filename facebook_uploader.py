@@ -19,6 +19,9 @@ class FacebookUploader:
         self.page_id = config.FB_PAGE_ID
         self.api_version = "v19.0"
         self.base_url = f"https://graph.facebook.com/{self.api_version}"
+        # One pooled session per uploader — the 3-step Reel flow reuses
+        # the same TLS connection instead of handshaking per request
+        self._session = requests.Session()
 
     def is_configured(self):
         """Check if FB credentials are set in .env."""
@@ -43,7 +46,7 @@ class FacebookUploader:
                 "upload_phase": "start",
                 "access_token": self.access_token
             }
-            init_res = requests.post(init_url, data=init_payload).json()
+            init_res = self._session.post(init_url, data=init_payload).json()
             
             if "error" in init_res:
                 logger.error(f"FB Init Error: {init_res['error']}")
@@ -63,7 +66,7 @@ class FacebookUploader:
                 "file_size": str(file_size)
             }
             with open(file_path, "rb") as f:
-                upload_res = requests.post(upload_url, headers=headers, data=f).json()
+                upload_res = self._session.post(upload_url, headers=headers, data=f).json()
                 
             if "error" in upload_res:
                 logger.error(f"FB File Upload Error: {upload_res['error']}")
@@ -81,7 +84,7 @@ class FacebookUploader:
                 "video_state": "PUBLISHED",
                 "description": description
             }
-            publish_res = requests.post(init_url, data=publish_payload).json()
+            publish_res = self._session.post(init_url, data=publish_payload).json()
             
             if "error" in publish_res:
                 logger.error(f"FB Publish Error: {publish_res['error']}")
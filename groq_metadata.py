@@ -2,6 +2,9 @@
 Groq metadata generator — uses Groq LLM to generate YouTube video metadata.
 Generates title, description, and tags from a video filename.
 """
+import atexit
+import functools
+import hashlib
 import json
 import logging
 
@@ -11,6 +14,69 @@ import config
 
 logger = logging.getLogger(__name__)
 
+# Optional C-implemented parse for LLM responses and the cache file;
+# stdlib json stays the fallback (and the writer — orjson emits bytes)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=1)
+def _groq_client() -> Groq:
+    """One Groq client per process — reuses its HTTP connection pool."""
+    return Groq(api_key=config.GROQ_API_KEY)
+
+# ─── Metadata cache ────────────────────────────────────────────────
+# Re-uploads and scheduler retries of the same file hit this cache
+# instead of re-paying the Groq round-trip. Persisted across restarts.
+
+CACHE_FILE = config.BASE_DIR / ".groq_cache.json"
+MAX_CACHE_ENTRIES = 512
+
+_metadata_cache: dict | None = None
+_cache_dirty = False
+
+
+def _cache_key(filename: str, extra_context: str) -> str:
+    """Stable key for a (model, filename, context) metadata request."""
+    raw = f"{config.GROQ_MODEL_FAST}|{filename}|{extra_context}".encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _get_cache() -> dict:
+    """Lazy-load the on-disk cache and register the save hook."""
+    global _metadata_cache
+    if _metadata_cache is None:
+        try:
+            _metadata_cache = _json_loads(CACHE_FILE.read_text())
+        # JSONDecodeError is a ValueError for both implementations
+        except (FileNotFoundError, ValueError, OSError):
+            _metadata_cache = {}
+        atexit.register(_save_cache)
+    return _metadata_cache
+
+
+def _save_cache():
+    """Persist the cache to disk (registered via atexit)."""
+    if not _cache_dirty or _metadata_cache is None:
+        return
+    try:
+        CACHE_FILE.write_text(json.dumps(_metadata_cache))
+    except OSError as e:
+        logger.warning(f"Could not save Groq metadata cache: {e}")
+
+
+def _cache_put(key: str, result: dict):
+    """Store a result, evicting the oldest entries past the size cap."""
+    global _cache_dirty
+    cache = _get_cache()
+    cache[key] = result
+    while len(cache) > MAX_CACHE_ENTRIES:
+        cache.pop(next(iter(cache)))
+    _cache_dirty = True
+
 
 def generate_metadata(filename: str, extra_context: str = "") -> dict:
     """
@@ -23,7 +89,13 @@ def generate_metadata(filename: str, extra_context: str = "") -> dict:
     Returns:
         dict with keys: title(title must contain one or two viral tag and theme video), description(description must contain one or two viral tag and theme video), tags(sebanyak mungkin tags must contain one or two viral tag and theme video)
     """
-    client = Groq(api_key=config.GROQ_API_KEY)
+    key = _cache_key(filename, extra_context)
+    cached = _get_cache().get(key)
+    if cached is not None:
+        logger.info(f"Metadata cache hit for '{filename}'")
+        return dict(cached)
+
+    client = _groq_client()
 
     prompt = config.METADATA_PROMPT_TEMPLATE.format(filename=filename)
 
@@ -32,7 +104,7 @@ def generate_metadata(filename: str, extra_context: str = "") -> dict:
 
     try:
         response = client.chat.completions.create(
-            model=config.GROQ_MODEL,
+            model=config.GROQ_MODEL_FAST,
             messages=[
                 {
                     "role": "system",
@@ -40,20 +112,15 @@ def generate_metadata(filename: str, extra_context: str = "") -> dict:
                 },
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.7,
-            max_tokens=500,
+            temperature=0,  # deterministic → cache-friendly
+            max_tokens=220,
+            response_format={"type": "json_object"},
         )
 
-        raw = response.choices[0].message.content.strip()
-
-        # Clean markdown code fences if present
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[1]  # remove first line
-            if raw.endswith("```"):
-                raw = raw[:-3]
-            raw = raw.strip()
-
-        metadata = json.loads(raw)
+        # json_object mode guarantees bare, parseable JSON — no
+        # markdown-fence cleanup needed
+        raw = response.choices[0].message.content
+        metadata = _json_loads(raw)
 
         result = {
             "title": metadata.get("title", filename),
@@ -61,10 +128,11 @@ def generate_metadata(filename: str, extra_context: str = "") -> dict:
             "tags": metadata.get("tags", ""),
         }
 
+        _cache_put(key, result)
         logger.info(f"Generated metadata for '{filename}': {result['title']}")
         return result
 
-    except json.JSONDecodeError as e:
+    except ValueError as e:  # JSONDecodeError under either implementation
         logger.error(f"Failed to parse Groq response as JSON: {e}")
         logger.error(f"Raw response: {raw}")
         return {
@@ -81,6 +149,105 @@ def generate_metadata(filename: str, extra_context: str = "") -> dict:
         }
 
 
+def generate_metadata_batch(filenames: list[str]) -> dict[str, dict]:
+    """
+    Generate metadata for several filenames with one Groq request.
+
+    Cached filenames are served from the metadata cache; the misses go
+    out as a single prompt asking for a filename-keyed JSON object, so k
+    uncached videos cost one round-trip instead of k. Any filename the
+    model skips or mangles falls back to the single-call path.
+
+    Returns:
+        dict mapping each input filename to its metadata dict.
+    """
+    results: dict[str, dict] = {}
+    misses = []
+    for fn in filenames:
+        cached = _get_cache().get(_cache_key(fn, ""))
+        if cached is not None:
+            results[fn] = dict(cached)
+        else:
+            misses.append(fn)
+
+    if not misses:
+        return results
+    if len(misses) == 1:
+        results[misses[0]] = generate_metadata(misses[0])
+        return results
+
+    listing = "\n".join(f"- {fn}" for fn in misses)
+    prompt = (
+        "For each video filename below, generate compelling YouTube metadata. "
+        "Respond with ONE JSON object mapping each filename EXACTLY as given to "
+        '{"title": "...", "description": "...", "tags": "tag1, tag2, ..."} '
+        "(no markdown, no extra text).\n\n"
+        f"Filenames:\n{listing}"
+    )
+
+    parsed = {}
+    try:
+        response = _groq_client().chat.completions.create(
+            model=config.GROQ_MODEL_FAST,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a YouTube SEO expert. Always respond with valid JSON only.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0,
+            max_tokens=min(4096, 220 * len(misses)),
+            response_format={"type": "json_object"},
+        )
+        parsed = _json_loads(response.choices[0].message.content)
+        logger.info(f"Generated batch metadata for {len(misses)} file(s)")
+    except Exception as e:
+        logger.error(f"Groq batch metadata error: {e}")
+
+    for fn in misses:
+        meta = parsed.get(fn) if isinstance(parsed, dict) else None
+        if isinstance(meta, dict) and meta.get("title"):
+            result = {
+                "title": meta.get("title", fn),
+                "description": meta.get("description", ""),
+                "tags": meta.get("tags", ""),
+            }
+            _cache_put(_cache_key(fn, ""), result)
+            results[fn] = result
+        else:
+            results[fn] = generate_metadata(fn)
+
+    return results
+
+
+def ask_groq_stream(prompt: str):
+    """
+    Stream a brainstorming response from Groq, yielding text deltas.
+
+    Lets the bot show the answer as it is generated instead of waiting
+    for the full completion. Raises on API errors — the caller owns the
+    user-facing error message.
+    """
+    stream = _groq_client().chat.completions.create(
+        model=config.GROQ_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a creative YouTube strategist and assistant. Give actionable, concise, and structured advice, ideas, or scripts.",
+            },
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.8,
+        max_tokens=1024,
+        stream=True,
+    )
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
 def ask_groq(prompt: str) -> str:
     """
     Send a custom prompt to Groq for brainstorming or general queries.
@@ -91,8 +258,8 @@ def ask_groq(prompt: str) -> str:
     Returns:
         The generated text response.
     """
-    client = Groq(api_key=config.GROQ_API_KEY)
-    
+    client = _groq_client()
+
     try:
         response = client.chat.completions.create(
             model=config.GROQ_MODEL,
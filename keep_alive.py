@@ -1,19 +0,0 @@
-from flask import Flask
-from threading import Thread
-import os
-
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return "Bot is alive!"
-
-def run():
-    port = int(os.environ.get("PORT", 8080))
-    app.run(host='0.0.0.0', port=port)
-
-def keep_alive():
-    """Starts a simple web server in a background thread to keep Render Web Services active."""
-    t = Thread(target=run)
-    t.daemon = True
-    t.start()
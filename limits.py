@@ -0,0 +1,50 @@
+"""
+Concurrency limits for the video pipeline.
+
+A token bucket smooths bursts of incoming videos (rate + burst) while an
+asyncio semaphore caps how many pipelines run at the same time, keeping
+bandwidth, disk and Groq usage bounded under load.
+"""
+import asyncio
+import time
+
+import config
+
+
+class TokenBucket:
+    """Simple asyncio token bucket: allows `rate` acquisitions per `period` seconds."""
+
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                refill = (now - self._last_refill) * self.rate / self.period
+                self._tokens = min(float(self.rate), self._tokens + refill)
+                self._last_refill = now
+
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+
+                # Sleep just long enough for the next token to appear
+                await asyncio.sleep((1.0 - self._tokens) * self.period / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+# Shared gates for the upload pipeline
+pipeline_bucket = TokenBucket(rate=config.VIDEO_RATE_PER_MINUTE)
+pipeline_semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_VIDEOS)
@@ -5,37 +5,68 @@ targeting US/EU peak hours. Max 3 uploads per day.
 """
 import logging
 import os
-from datetime import datetime, timezone, timedelta
+import re
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import config
+from config import WIB
 from sheets_manager import SheetsManager
 from drive_uploader import DriveUploader
 from youtube_uploader import YouTubeUploader
 from facebook_uploader import FacebookUploader
-from groq_metadata import generate_metadata
+from groq_metadata import generate_metadata, generate_metadata_batch
+from streams import TailingReader
 
 logger = logging.getLogger(__name__)
 
-WIB = timezone(timedelta(hours=7))
+# Matches the file ID in the Drive link formats the sheet contains
+# (.../file/d/<id>/... and ...?id=<id>), compiled once at import
+_DRIVE_ID_RE = re.compile(r"(?:/file/d/|[?&]id=)([A-Za-z0-9_-]{10,})")
+
+
+def _parse_schedule_slots() -> tuple[tuple[int, str], ...]:
+    """Parse UPLOAD_SCHEDULE_HOURS into (minutes-since-midnight, "HH:MM")
+    pairs, dropping malformed entries."""
+    slots = []
+    for time_str in config.UPLOAD_SCHEDULE_HOURS:
+        try:
+            h, m = time_str.split(":")
+            slots.append((int(h) * 60 + int(m), time_str))
+        except (ValueError, AttributeError):
+            continue
+    return tuple(slots)
+
+
+# Upload slots, parsed once at import (config is env-fixed)
+_SCHEDULE_SLOTS = _parse_schedule_slots()
 
 
 class Scheduler:
     """Manages the video upload queue with viral hour scheduling."""
 
-    def __init__(self):
-        self.sheets = SheetsManager()
-        self.drive = DriveUploader()
+    def __init__(self, sheets: SheetsManager = None, drive: DriveUploader = None):
+        """
+        Args:
+            sheets: Existing SheetsManager to reuse (a new one is built
+                    if omitted). Sharing avoids a duplicate auth handshake.
+            drive: Existing DriveUploader to reuse, same reasoning.
+        """
+        self.sheets = sheets or SheetsManager()
+        self.drive = drive or DriveUploader()
         self._youtube_cache = {}  # channel_name -> YouTubeUploader
+        self._youtube_lock = threading.Lock()  # guards cache fills from worker threads
         self._facebook_uploader = FacebookUploader()
         self.temp_dir = config.TEMP_DIR
 
     def _get_youtube(self, channel_name: str = None) -> YouTubeUploader:
         """Get or create YouTube uploader for a specific channel."""
         channel = channel_name or config.DEFAULT_CHANNEL
-        if channel not in self._youtube_cache:
-            self._youtube_cache[channel] = YouTubeUploader(channel)
-        return self._youtube_cache[channel]
+        with self._youtube_lock:
+            if channel not in self._youtube_cache:
+                self._youtube_cache[channel] = YouTubeUploader(channel)
+            return self._youtube_cache[channel]
         
     def _get_facebook(self) -> FacebookUploader:
         """Get the Facebook Uploader instance."""
@@ -49,21 +80,13 @@ class Scheduler:
         now = datetime.now(WIB)
         current_minutes = now.hour * 60 + now.minute
 
-        for time_str in config.UPLOAD_SCHEDULE_HOURS:
-            try:
-                h, m = map(int, time_str.split(":"))
-                scheduled_minutes = h * 60 + m
-
-                # Check if within ±30 minute window to prevent stuck pending videos
-                diff = abs(current_minutes - scheduled_minutes)
-                # Handle midnight wrap (e.g., 23:58 vs 00:00)
-                if diff > 720:  # more than 12 hours
-                    diff = 1440 - diff
-
-                if diff <= 30:
-                    return True
-            except (ValueError, AttributeError):
-                continue
+        for scheduled_minutes, _ in _SCHEDULE_SLOTS:
+            # Check if within ±30 minute window to prevent stuck pending
+            # videos; min() handles the midnight wrap (23:58 vs 00:00)
+            # without a branch
+            diff = abs(current_minutes - scheduled_minutes)
+            if min(diff, 1440 - diff) <= 30:
+                return True
 
         return False
 
@@ -73,16 +96,11 @@ class Scheduler:
         current_minutes = now.hour * 60 + now.minute
 
         upcoming = []
-        for time_str in config.UPLOAD_SCHEDULE_HOURS:
-            try:
-                h, m = map(int, time_str.split(":"))
-                scheduled_minutes = h * 60 + m
-                diff = scheduled_minutes - current_minutes
-                if diff < 0:
-                    diff += 1440  # next day
-                upcoming.append((diff, time_str))
-            except (ValueError, AttributeError):
-                continue
+        for scheduled_minutes, time_str in _SCHEDULE_SLOTS:
+            diff = scheduled_minutes - current_minutes
+            if diff < 0:
+                diff += 1440  # next day
+            upcoming.append((diff, time_str))
 
         if upcoming:
             upcoming.sort()
@@ -117,9 +135,90 @@ class Scheduler:
         for platform in ["youtube", "facebook"]:
             res = self._process_platform_queue(platform, force=True)
             results.extend(res)
-            
+
         return results
 
+    def plan_queue_batch(self) -> list[dict]:
+        """
+        Collect what a scheduled run would upload right now: at most one
+        video per platform per slot, quota permitting, platform-tagged.
+
+        The bot's job callback uploads the returned videos concurrently
+        via upload_one(), so YouTube and Facebook overlap instead of
+        running back-to-back.
+        """
+        if not self.is_upload_time():
+            logger.info(f"Not upload time yet. Next: {self.get_next_upload_time()}")
+            return []
+
+        today = datetime.now(WIB).strftime("%Y-%m-%d")
+        tomorrow = (datetime.now(WIB) + timedelta(days=1)).strftime("%Y-%m-%d")
+        batch = []
+
+        for platform in ["youtube", "facebook"]:
+            uploads_today = self.sheets.count_uploads_today(platform=platform)
+            max_uploads = config.MAX_UPLOADS_PER_DAY_FACEBOOK if platform == "facebook" else config.MAX_UPLOADS_PER_DAY_YOUTUBE
+
+            if uploads_today >= max_uploads:
+                logger.info(f"Daily upload limit reached for {platform}.")
+                self._schedule_remaining(tomorrow, platform)
+                continue
+
+            scheduled = self.sheets.get_scheduled_videos(today, platform=platform)
+            pending = self.sheets.get_pending_videos(platform=platform)
+
+            for video in (scheduled + pending)[:1]:
+                video["platform"] = platform
+                batch.append(video)
+
+        self._prefetch_metadata(batch)
+
+        return batch
+
+    def plan_force_batch(self) -> list[dict]:
+        """
+        Collect the videos a forced run would upload, tagged with their
+        platform, without uploading anything yet.
+
+        Quota accounting happens here up front so the bot can fan the
+        actual uploads out across worker threads via upload_one().
+        """
+        today = datetime.now(WIB).strftime("%Y-%m-%d")
+        batch = []
+
+        for platform in ["youtube", "facebook"]:
+            uploads_today = self.sheets.count_uploads_today(platform=platform)
+            max_uploads = config.MAX_UPLOADS_PER_DAY_FACEBOOK if platform == "facebook" else config.MAX_UPLOADS_PER_DAY_YOUTUBE
+            remaining = max_uploads - uploads_today
+
+            if remaining <= 0:
+                continue
+
+            scheduled = self.sheets.get_scheduled_videos(today, platform=platform)
+            pending = self.sheets.get_pending_videos(platform=platform)
+
+            for video in (scheduled + pending)[:remaining]:
+                video["platform"] = platform
+                batch.append(video)
+
+        # One Groq round-trip for all missing titles before the workers
+        # start uploading concurrently
+        self._prefetch_metadata(batch)
+
+        return batch
+
+    def upload_one(self, video: dict) -> dict:
+        """
+        Upload one video planned by plan_force_batch().
+
+        Safe to call from several worker threads at once: sheet writes are
+        independent HTTP calls, temp paths are keyed by filename, the
+        YouTube uploader cache is lock-guarded, and the Drive/YouTube
+        services build a fresh AuthorizedHttp per request, so concurrent
+        workers never share an httplib2 connection.
+        """
+        return self._process_single(video, video["platform"])
+
     def _process_platform_queue(self, platform: str, force: bool = False) -> list[dict]:
         """Process the upload queue for a specific platform."""
         today = datetime.now(WIB).strftime("%Y-%m-%d")
@@ -149,11 +248,14 @@ class Scheduler:
             return []
 
         results = []
-        
+
         # If forced, try to process all remaining slots.
         # If scheduled time, only process 1 video per slot.
         limit = remaining if force else 1
-        
+
+        # One Groq round-trip for all missing titles in this batch
+        self._prefetch_metadata(to_process[:limit])
+
         for video in to_process[:limit]:
             result = self._process_single(video, platform)
             results.append(result)
@@ -168,6 +270,18 @@ class Scheduler:
 
         return results
 
+    def _prefetch_metadata(self, videos: list[dict]):
+        """Warm the Groq cache for a batch's missing titles in one call.
+
+        _process_single still generates (and writes back) metadata per
+        video, but after this its calls are cache hits."""
+        missing = [v["filename"] for v in videos if not v.get("title", "").strip()]
+        if len(missing) > 1:
+            try:
+                generate_metadata_batch(missing)
+            except Exception as e:
+                logger.warning(f"Batch metadata prefetch failed: {e}")
+
     def _process_single(self, video: dict, platform: str) -> dict:
         """
         Process a single video: generate metadata if missing,
@@ -200,8 +314,6 @@ class Scheduler:
                 raise ValueError(f"Could not extract Drive file ID from: {drive_link}")
 
             local_path = str(self.temp_dir / filename)
-            logger.info(f"Downloading from Drive: {file_id}")
-            self.drive.download(file_id, local_path)
 
             # Step 3: Upload to platform
             channel = video.get("channel", config.DEFAULT_CHANNEL)
@@ -210,15 +322,14 @@ class Scheduler:
             video_link = ""
 
             if platform == "youtube":
-                yt = self._get_youtube(channel)
-                result = yt.upload(
-                    file_path=local_path,
-                    title=video["title"],
-                    description=video.get("description", ""),
-                    tags=video.get("tags", ""),
+                # Download and upload overlap — the YouTube upload tails
+                # the file the Drive download is still writing
+                video_link = self._stream_drive_to_youtube(
+                    video, file_id, local_path, channel
                 )
-                video_link = result["youtube_link"]
             elif platform == "facebook":
+                logger.info(f"Downloading from Drive: {file_id}")
+                self.drive.download(file_id, local_path)
                 fb = self._get_facebook()
                 desc = f"{video['title']}\n\n{video.get('description', '')}"
                 result = fb.upload_reel(
@@ -232,11 +343,12 @@ class Scheduler:
             # Step 4: Update sheet with link
             self.sheets.set_youtube_link(row, video_link, platform=platform)
 
-            # Step 5: Clean up temp file
+            # Step 5: Clean up temp file (EAFP — one unlink, no stat first)
             try:
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-                    logger.info(f"Cleaned up temp file: {local_path}")
+                os.remove(local_path)
+                logger.info(f"Cleaned up temp file: {local_path}")
+            except FileNotFoundError:
+                pass
             except PermissionError:
                 logger.warning(f"Could not remove temp file: {local_path}")
 
@@ -257,6 +369,53 @@ class Scheduler:
                 "error": str(e),
             }
 
+    def _stream_drive_to_youtube(
+        self, video: dict, file_id: str, local_path: str, channel: str
+    ) -> str:
+        """
+        Pipe a Drive file into a YouTube upload without waiting for the
+        full download.
+
+        A producer thread stages the file into local_path while the
+        YouTube resumable upload reads the same file just behind it
+        (TailingReader), so the video costs roughly max(download, upload)
+        instead of their sum and the bytes are read back while still hot
+        in the page cache. The temp file itself stays — the resumable
+        protocol needs a seekable source for chunk retries.
+        """
+        file_size = self.drive.get_size(file_id)
+        logger.info(f"Streaming from Drive: {file_id} ({file_size} bytes)")
+
+        done = threading.Event()
+        errors: list[Exception] = []
+
+        def _produce():
+            try:
+                self.drive.download(file_id, local_path)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        producer = threading.Thread(target=_produce, daemon=True)
+        producer.start()
+
+        reader = TailingReader(local_path, file_size, done)
+        try:
+            result = self._get_youtube(channel).upload_stream(
+                reader,
+                title=video["title"],
+                description=video.get("description", ""),
+                tags=video.get("tags", ""),
+            )
+        finally:
+            reader.close()
+            producer.join()
+
+        if errors:
+            raise errors[0]
+        return result["youtube_link"]
+
     def _schedule_remaining(self, date_str: str, platform: str):
         """Schedule all remaining pending videos for a future date."""
         pending = self.sheets.get_pending_videos(platform=platform)
@@ -272,15 +431,10 @@ class Scheduler:
         if not drive_link:
             return ""
 
-        # Handle various Drive link formats
-        if "/file/d/" in drive_link:
-            parts = drive_link.split("/file/d/")[1]
-            return parts.split("/")[0].split("?")[0]
-
-        if "id=" in drive_link:
-            return drive_link.split("id=")[1].split("&")[0]
-
-        return drive_link.strip()
+        # One regex scan instead of split chains; a bare ID (no known
+        # link format) passes through unchanged
+        m = _DRIVE_ID_RE.search(drive_link)
+        return m.group(1) if m else drive_link.strip()
 
     def get_status_message(self) -> str:
         """Generate a human-readable status message."""
@@ -294,14 +448,14 @@ class Scheduler:
         now_str = datetime.now(WIB).strftime("%H:%M WIB")
 
         msg = (
-            "📊 **Upload Queue Status**\n\n"
+            "📊 <b>Upload Queue Status</b>\n\n"
             f"📺 <b>YouTube</b>:\n"
             f"📹 Total: {yt_summary['total']} | ⏳ Pending: {yt_summary['pending']} | 📅 Scheduled: {yt_summary['scheduled']}\n"
             f"📤 Uploads today: {yt_summary['uploads_today']}/{config.MAX_UPLOADS_PER_DAY_YOUTUBE}\n\n"
             f"📘 <b>Facebook</b>:\n"
             f"📹 Total: {fb_summary['total']} | ⏳ Pending: {fb_summary['pending']} | 📅 Scheduled: {fb_summary['scheduled']}\n"
             f"📤 Uploads today: {fb_summary['uploads_today']}/{config.MAX_UPLOADS_PER_DAY_FACEBOOK}\n\n"
-            f"🕐 Schedule: `{schedule_str}` WIB\n"
+            f"🕐 Schedule: <code>{schedule_str}</code> WIB\n"
             f"⏰ Now: {now_str}\n"
             f"⏭️ Next upload: {next_time}\n"
             f"{'🟢 Upload window ACTIVE' if is_upload else '🔴 Waiting for next window'}"
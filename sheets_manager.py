@@ -3,12 +3,14 @@ Google Sheets manager — manages the upload queue and logging.
 Uses a service account for authentication via gspread.
 """
 import logging
-from datetime import datetime, timezone, timedelta
+import time
+from datetime import datetime, timedelta
 
 import gspread
 from google.oauth2.service_account import Credentials
 
 import config
+from config import WIB
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +19,8 @@ SCOPES = [
     "https://www.googleapis.com/auth/drive",
 ]
 
-# Timezone WIB (UTC+7)
-WIB = timezone(timedelta(hours=7))
+# How long a fetched sheet snapshot stays valid (seconds)
+CACHE_TTL_SECONDS = 30
 
 class SheetsManager:
     """Manages Google Sheets for video upload queue and logging."""
@@ -27,6 +29,9 @@ class SheetsManager:
         self.sheet = None
         self.fb_sheet = None
         self.ideas_sheet = None
+        # platform -> (expiry, rows) snapshot cache so repeated reads
+        # (/queue, summaries, counts) reuse one API round-trip
+        self._values_cache = {}
         self._init_sheet()
 
     def _get_credentials(self):
@@ -113,39 +118,45 @@ class SheetsManager:
             ]
             self.ideas_sheet.append_row(headers)
 
-    def add_video(
-        self, filename: str, drive_link: str, channel: str = "", status: str = "pending", platform: str = "youtube"
-    ) -> int:
+    def _all_values(self, platform: str = "youtube") -> list[list[str]]:
         """
-        Add a new video entry to the sheet.
+        Get all rows for a platform's queue sheet, cached for a short TTL.
 
-        Returns:
-            Row number of the new entry.
+        Every read path (pending, scheduled, counts, summary) goes through
+        this so one API fetch serves them all. Writes invalidate the cache.
         """
-        if not channel:
-            channel = config.DEFAULT_CHANNEL
-            
+        hit = self._values_cache.get(platform)
+        if hit and hit[0] > time.monotonic():
+            return hit[1]
+
         target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
-            
-        # Determine the Scheduled Date based on the queue summary
+        rows = target_sheet.get_all_values()
+        self._values_cache[platform] = (time.monotonic() + CACHE_TTL_SECONDS, rows)
+        return rows
+
+    def _invalidate_cache(self):
+        """Drop cached sheet snapshots after any write."""
+        self._values_cache.clear()
+
+    def _scheduled_date_for_new_video(self, platform: str) -> str:
+        """Pick the queue date for a new entry based on today's remaining slots."""
         summary = self.get_queue_summary(platform=platform)
         now_dt = datetime.now(WIB)
-        
+
         # If today's slot is filled up, schedule for the next available day
         # For simplicity, we fallback to tomorrow if remaining <= 0
         if summary["remaining_today"] > 0:
-            scheduled_date = now_dt.strftime("%Y-%m-%d")
             # Status can remain 'pending' to allow manual edits. We only label it
             # 'scheduled' if it's explicitly pushed to tomorrow by the scheduler.
             # But the date itself acts as the queue bucket.
-        else:
-            scheduled_date = (now_dt + timedelta(days=1)).strftime("%Y-%m-%d")
-            
-        now_str = now_dt.strftime("%Y-%m-%d %H:%M:%S")
-        row = [now_str, filename, drive_link, "", "", "", status, "", scheduled_date, channel]
-        
+            return now_dt.strftime("%Y-%m-%d")
+        return (now_dt + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def _append_and_locate(self, target_sheet, row: list) -> int:
+        """Append a row and return its 1-indexed row number."""
         result = target_sheet.append_row(row, value_input_option="USER_ENTERED")
-        
+        self._invalidate_cache()
+
         try:
             # Extract exact row from 'updates.updatedRange' (e.g., "'Queue'!A11:J11")
             updated_range = result.get("updates", {}).get("updatedRange", "")
@@ -158,18 +169,84 @@ class SheetsManager:
         except Exception:
             row_num = len(target_sheet.get_all_values())
 
+        return row_num
+
+    def add_video(
+        self, filename: str, drive_link: str, channel: str = "", status: str = "pending", platform: str = "youtube"
+    ) -> int:
+        """
+        Add a new video entry to the sheet.
+
+        Returns:
+            Row number of the new entry.
+        """
+        if not channel:
+            channel = config.DEFAULT_CHANNEL
+
+        target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
+        scheduled_date = self._scheduled_date_for_new_video(platform)
+
+        now_str = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S")
+        row = [now_str, filename, drive_link, "", "", "", status, "", scheduled_date, channel]
+
+        row_num = self._append_and_locate(target_sheet, row)
         logger.info(f"Added video '{filename}' to {platform} at row {row_num} (channel: {channel})")
         return row_num
 
+    def add_video_full(
+        self,
+        filename: str,
+        drive_link: str,
+        title: str,
+        description: str,
+        tags: str,
+        channel: str = "",
+        status: str = "pending",
+        platform: str = "youtube",
+    ) -> int:
+        """
+        Add a new video entry with metadata already populated.
+
+        One append call instead of the add_video + update_metadata pair,
+        halving the Sheets round-trips per video.
+
+        Returns:
+            Row number of the new entry.
+        """
+        if not channel:
+            channel = config.DEFAULT_CHANNEL
+
+        target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
+        scheduled_date = self._scheduled_date_for_new_video(platform)
+
+        now_str = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S")
+        row = [
+            now_str, filename, drive_link, title, description, tags,
+            status, "", scheduled_date, channel,
+        ]
+
+        row_num = self._append_and_locate(target_sheet, row)
+        logger.info(
+            f"Added video '{filename}' with metadata to {platform} at row {row_num} "
+            f"(channel: {channel})"
+        )
+        return row_num
+
     def update_metadata(
         self, row: int, title: str, description: str, tags: str, platform: str = "youtube"
     ):
         """Update the Groq-generated metadata for a video row."""
         col = config.SHEET_COLUMNS
         target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
-        target_sheet.update_cell(row, col["title"], title)
-        target_sheet.update_cell(row, col["description"], description)
-        target_sheet.update_cell(row, col["tags"], tags)
+        # title/description/tags are adjacent columns — one ranged update
+        # instead of three update_cell round-trips
+        first = chr(ord("A") + col["title"] - 1)
+        last = chr(ord("A") + col["tags"] - 1)
+        target_sheet.update(
+            values=[[title, description, tags]],
+            range_name=f"{first}{row}:{last}{row}",
+        )
+        self._invalidate_cache()
         logger.info(f"Metadata updated for row {row} on {platform}: '{title}'")
 
     def update_status(self, row: int, status: str, platform: str = "youtube"):
@@ -177,6 +254,7 @@ class SheetsManager:
         col = config.SHEET_COLUMNS
         target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
         target_sheet.update_cell(row, col["status"], status)
+        self._invalidate_cache()
         logger.info(f"Row {row} on {platform} status → '{status}'")
 
     def set_youtube_link(self, row: int, youtube_link: str, platform: str = "youtube"):
@@ -184,6 +262,7 @@ class SheetsManager:
         col = config.SHEET_COLUMNS
         target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
         target_sheet.update_cell(row, col["youtube_link"], youtube_link)
+        self._invalidate_cache()
         self.update_status(row, "uploaded")
         logger.info(f"Row {row} YouTube link → {youtube_link}")
 
@@ -192,6 +271,7 @@ class SheetsManager:
         col = config.SHEET_COLUMNS
         target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
         target_sheet.update_cell(row, col["scheduled_date"], date_str)
+        self._invalidate_cache()
         self.update_status(row, "scheduled", platform=platform)
 
     def get_pending_videos(self, platform: str = "youtube") -> list[dict]:
@@ -201,8 +281,7 @@ class SheetsManager:
         Returns:
             List of dicts with row number and video data.
         """
-        target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
-        all_rows = target_sheet.get_all_values()
+        all_rows = self._all_values(platform)
         pending = []
 
         for i, row in enumerate(all_rows[1:], start=2):  # skip header
@@ -231,8 +310,7 @@ class SheetsManager:
         if date_str is None:
             date_str = datetime.now(WIB).strftime("%Y-%m-%d")
 
-        target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
-        all_rows = target_sheet.get_all_values()
+        all_rows = self._all_values(platform)
         scheduled = []
 
         for i, row in enumerate(all_rows[1:], start=2):
@@ -253,11 +331,21 @@ class SheetsManager:
                     })
         return scheduled
 
+    def get_queue(self, platform: str = "youtube") -> list[dict]:
+        """
+        Get all scheduled and pending videos in one pass.
+
+        Both lists are parsed from the same cached snapshot, so this costs
+        a single API fetch instead of two.
+        """
+        videos = self.get_scheduled_videos("all", platform=platform)
+        videos.extend(self.get_pending_videos(platform=platform))
+        return videos
+
     def count_uploads_today(self, platform: str = "youtube") -> int:
         """Count how many videos have been uploaded today (WIB)."""
         today = datetime.now(WIB).strftime("%Y-%m-%d")
-        target_sheet = self.fb_sheet if platform == "facebook" else self.sheet
-        all_rows = target_sheet.get_all_values()
+        all_rows = self._all_values(platform)
         count = 0
 
         for row in all_rows[1:]:
@@ -269,8 +357,7 @@ class SheetsManager:
 
     def get_queue_summary(self, platform: str = "youtube") -> dict:
         """Get a summary of the current queue."""
-        target_sheet = self.fb_sheet if platform == "facebook" else self. sheet
-        all_rows = target_sheet.get_all_values()
+        all_rows = self._all_values(platform)
         summary = {
             "total": len(all_rows) - 1,
             "pending": 0,
@@ -0,0 +1,79 @@
+"""
+Streaming helpers — file-backed producer/consumer bridges for uploads.
+
+Used to overlap a download with an upload of the same bytes: a producer
+thread stages the file to disk while the consumer reads the same file
+just behind it, so a transfer costs roughly max(download, upload)
+instead of their sum and the read-back hits the still-hot page cache.
+"""
+import io
+import os
+import threading
+import time
+
+
+class TailingReader(io.RawIOBase):
+    """
+    Read-only view of a file another thread is still writing.
+
+    Implements the seek/tell/read calls googleapiclient's MediaIoBaseUpload
+    makes, blocking reads until the producer has written enough bytes.
+    The final size must be known up front.
+    """
+
+    def __init__(self, path: str, total_size: int, done: threading.Event):
+        super().__init__()
+        self._path = path
+        self._size = total_size
+        self._done = done
+        self._fd = None
+        self._pos = 0
+
+    def _ensure_open(self):
+        # The producer creates the file; wait for it to appear
+        while self._fd is None:
+            try:
+                self._fd = open(self._path, "rb")
+            except FileNotFoundError:
+                if self._done.is_set():
+                    raise
+                time.sleep(0.05)
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END:
+            self._pos = self._size + offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, n=-1):
+        self._ensure_open()
+        if n is None or n < 0:
+            end = self._size
+        else:
+            end = min(self._pos + n, self._size)
+        while (
+            not self._done.is_set()
+            and os.fstat(self._fd.fileno()).st_size < end
+        ):
+            time.sleep(0.05)
+        self._fd.seek(self._pos)
+        data = self._fd.read(end - self._pos)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        if self._fd is not None:
+            self._fd.close()
+        super().close()
@@ -6,11 +6,13 @@ import logging
 import os
 from pathlib import Path
 
+import google_auth_httplib2
+import httplib2
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import HttpRequest, MediaFileUpload, MediaIoBaseUpload
 
 import config
 
@@ -33,7 +35,25 @@ class YouTubeUploader:
         self.channel_name = channel_name or config.DEFAULT_CHANNEL
         self.token_file = config.get_channel_token_file(self.channel_name)
         self.creds = self._authenticate()
-        self.service = build("youtube", "v3", credentials=self.creds)
+        # Same-channel uploads share this cached instance across worker
+        # threads, and httplib2 is not thread-safe — give every API
+        # request its own AuthorizedHttp (the documented googleapiclient
+        # multithreading pattern).
+        self.service = build(
+            "youtube",
+            "v3",
+            http=self._fresh_http(),
+            requestBuilder=self._build_request,
+            cache_discovery=False,
+        )
+
+    def _fresh_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        """A new authorized httplib2 connection (never shared)."""
+        return google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http())
+
+    def _build_request(self, http, *args, **kwargs) -> HttpRequest:
+        """requestBuilder hook: ignore the service's http, use a fresh one."""
+        return HttpRequest(self._fresh_http(), *args, **kwargs)
 
     def _authenticate(self) -> Credentials:
         """Authenticate with YouTube using OAuth2."""
@@ -138,3 +158,74 @@ class YouTubeUploader:
             "video_id": video_id,
             "youtube_link": youtube_link,
         }
+
+    def upload_stream(
+        self,
+        fileobj,
+        title: str,
+        description: str = "",
+        tags: str = "",
+        category: str = None,
+        privacy: str = None,
+    ) -> dict:
+        """
+        Upload a video to YouTube from a file-like object.
+
+        The source only needs to support the seek/tell/read calls
+        MediaIoBaseUpload makes — e.g. a TailingReader over a file that
+        is still being downloaded.
+
+        Returns:
+            dict with keys: video_id, youtube_link
+        """
+        if category is None:
+            category = config.YOUTUBE_CATEGORY
+        if privacy is None:
+            privacy = config.YOUTUBE_PRIVACY
+
+        tag_list = [t.strip() for t in tags.split(",") if t.strip()]
+
+        body = {
+            "snippet": {
+                "title": title[:100],
+                "description": description[:5000],
+                "tags": tag_list,
+                "categoryId": category,
+            },
+            "status": {
+                "privacyStatus": privacy,
+                "selfDeclaredMadeForKids": False,
+            },
+        }
+
+        media = MediaIoBaseUpload(
+            fileobj,
+            mimetype="video/mp4",
+            resumable=True,
+            chunksize=10 * 1024 * 1024,
+        )
+
+        logger.info(f"Streaming to YouTube ({self.channel_name}): '{title}'...")
+
+        request = self.service.videos().insert(
+            part="snippet,status",
+            body=body,
+            media_body=media,
+        )
+
+        response = None
+        while response is None:
+            status, response = request.next_chunk()
+            if status:
+                progress = int(status.progress() * 100)
+                logger.info(f"YouTube upload progress: {progress}%")
+
+        video_id = response["id"]
+        youtube_link = f"https://youtu.be/{video_id}"
+
+        logger.info(f"Upload complete ({self.channel_name}): {youtube_link}")
+
+        return {
+            "video_id": video_id,
+            "youtube_link": youtube_link,
+        }